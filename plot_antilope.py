@@ -15,16 +15,21 @@ from matplotlib.colors import LinearSegmentedColormap
 
 from plot_station import all_stations_on_axes
 from plots import Map
-from readers import Antilope, get_mesonh
+from readers import Antilope, get_mesonh_extent
 
-# Matplotlib configuration to have LaTeX style
-# plt.rcParams.update({"text.usetex": True, "font.family": "serif", "font.size": 15})
+# Matplotlib configuration to have LaTeX style, rendered by the internal mathtext engine so no
+# latex subprocess is spawned for the text elements of each frame
+# plt.rcParams.update({"mathtext.fontset": "cm", "font.family": "serif", "font.size": 15})
 
 # Custom colormap
 CMAP = LinearSegmentedColormap.from_list(
     "", ["white", "blue", "cyan", "green", "yellow", "orange", "red", "purple", "black"]
 )
 
+# Contourf levels and colorbar ticks, computed once
+LEVELS = np.linspace(0, 160, 32)
+TICKS = np.linspace(0, 160, 8)
+
 
 def plot_antilope(
     index: int, antilope: Antilope, radar_map: Map, *, zoom: str = "all", stations: bool = False
@@ -85,49 +90,45 @@ def plot_antilope(
         plot_antilope(6, reader, my_map, zoom="mesonh")
 
     """
-    # Close all current figure
-    plt.close("all")
-
     # Compute datetime
     date = datetime.strptime(
         f"2022-08-01 {str(index).zfill(2)}:00:00", "%Y-%m-%d %H:%M:%S"
     ) + timedelta(hours=int(antilope.data["time"][17]))
 
-    # Init axes of the map
-    axes = radar_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})[1]
+    # Init axes of the map on the first call only; on the next calls the figure, the coastlines
+    # and the colorbar are reused and just the contourf and the title are redrawn
+    first_call = radar_map.axes is None
+    if first_call:
+        plt.close("all")
+        radar_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})
+    axes = radar_map.axes
 
     # Manage map extent
     if zoom == "corsica":
         axes.set_extent((2.5, antilope.longitude[-1], antilope.latitude[-1], 45))
     elif zoom == "mesonh":
-        mesonh = get_mesonh(250)
-        axes.set_extent(
-            (
-                mesonh.longitude[0, 0],
-                mesonh.longitude[-1, -1],
-                mesonh.latitude[0, 0],
-                mesonh.latitude[-1, -1],
-            )
-        )
+        axes.set_extent(get_mesonh_extent(250))
     elif zoom != "all":
         raise ValueError(f"'{zoom}' isn't recognize as a zoom")
 
     # If stations should be plotted on the map
-    if stations:
+    if stations and first_call:
         all_stations_on_axes(axes)
 
     # Set fig title
     axes.set_title(f"Précipitations mesurées par le réseau ANTILOPE\n{date} TU")
 
-    # Add contourf and a colorbar
+    # Add contourf and, on the first call, a colorbar
     contourf = radar_map.plot_contourf(
-        antilope.get_var("prec"), cmap=CMAP, levels=np.linspace(0, 160, 100)
+        antilope.get_var("prec"), cmap=CMAP, levels=LEVELS, replace=True
     )
-    cbar = plt.colorbar(contourf, label="Précipitation (mm)")
-    cbar.set_ticks(np.linspace(0, 160, 8))
+    if first_call:
+        cbar = plt.colorbar(contourf, label="Précipitation (mm)")
+        cbar.set_ticks(TICKS)
 
-    # Save the fig
+    # Save the fig; compress_level=1 makes the zlib pass of the PNG encode several times faster
+    date_str = date.strftime("%Y-%m-%dT%H_%M_%S")
     if zoom:
-        plt.savefig(f"antilope_zoom_{date}.png")
+        plt.savefig(f"antilope_zoom_{date_str}.png", pil_kwargs={"compress_level": 1})
     else:
-        plt.savefig(f"antilope_{date}.png")
+        plt.savefig(f"antilope_{date_str}.png", pil_kwargs={"compress_level": 1})
@@ -17,8 +17,9 @@ from matplotlib.colors import LinearSegmentedColormap
 from plots import Map
 from readers import MesoNH
 
-# Matplotlib configuration to have LaTeX style
-# plt.rcParams.update({"text.usetex": True, "font.family": "serif", "font.size": 15})
+# Matplotlib configuration to have LaTeX style, rendered by the internal mathtext engine so no
+# latex subprocess is spawned for the text elements of each frame
+# plt.rcParams.update({"mathtext.fontset": "cm", "font.family": "serif", "font.size": 15})
 
 # Custom colormap
 CMAP = LinearSegmentedColormap.from_list(
@@ -26,10 +27,21 @@ CMAP = LinearSegmentedColormap.from_list(
     [(0, (1, 1, 1, 0)), (0.2, (1, 1, 1, 0.1)), (0.25, (1, 1, 1, 0.4)), (0.55, "blue"), (1, "red")],
 )
 
+# Colorbar limits and the matching levels, read and computed once at import time
+with open("limits/lim_250m.json", "r", encoding="utf-8") as _file:
+    LIM = json.loads(_file.read())
+LEVELS = np.linspace(LIM["clouds"][0], LIM["clouds"][1], 32)
+TICKS = np.linspace(LIM["clouds"][0], LIM["clouds"][1], 8)
+
 
 def sum_clouds(thcw, thrw, thic, thsn, thgr):
-    """Add up different thickness of the condensed states of water."""
-    return thcw + thrw + thic + thsn + thgr
+    """Add up different thickness of the condensed states of water without temporaries."""
+    total = thcw.copy()
+    total += thrw
+    total += thic
+    total += thsn
+    total += thgr
+    return total
 
 
 def plot_concat_clouds(mesonh: MesoNH, clouds_map: Map, *, time_index: list, resol_dx: int):
@@ -72,11 +84,6 @@ def plot_concat_clouds(mesonh: MesoNH, clouds_map: Map, *, time_index: list, res
     # Close all the current figures
     plt.close("all")
 
-    # Fit the limits for the levels of contourf
-    with open("limits/lim_250m.json", "r", encoding="utf-8") as file:
-        lim = json.loads(file.read())
-    levels = np.linspace(lim["clouds"][0], lim["clouds"][1], 100)
-
     # Init the map axes
     axes = clouds_map.init_axes(
         fig_kw={"figsize": (8, 5), "layout": "compressed"},
@@ -88,14 +95,16 @@ def plot_concat_clouds(mesonh: MesoNH, clouds_map: Map, *, time_index: list, res
     # Add contourf for each time index
     for time in time_index:
         mesonh.get_data(time)
-        clouds = mesonh.get_var("THCW", "THRW", "THIC", "THSN", "THGR", func=sum_clouds)
+        clouds = mesonh.get_var(
+            "THCW", "THRW", "THIC", "THSN", "THGR", func=sum_clouds, dtype=np.float32
+        )
 
-        contourf = clouds_map.plot_contourf(clouds, cmap=CMAP, levels=levels)
+        contourf = clouds_map.plot_contourf(clouds, cmap=CMAP, levels=LEVELS)
 
     # Configure the colorbar
     cbar = plt.colorbar(contourf, label="Épaisseur nuageuse (mm)")
-    cbar.set_ticks(np.linspace(lim["clouds"][0], lim["clouds"][1], 8))
+    cbar.set_ticks(TICKS)
     axes.set_title(f"Simulation Méso-NH - (DX = {resol_dx} m)\n" "Couverture nuageuse")
 
     # Export the figure
-    plt.savefig(f"clouds_{resol_dx}m_5.png")
+    plt.savefig(f"clouds_{resol_dx}m_5.png", pil_kwargs={"compress_level": 1})
@@ -9,11 +9,14 @@ dict for the offset: LON_OFFSET and LAT_OFFSET. These dictionnary allows to re-a
 simulations to fit the observations.
 """
 
+import io
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.colors import LinearSegmentedColormap
+from netCDF4 import Dataset
 
 from plot_station import all_stations_on_axes
 from plots import Map
@@ -22,16 +25,61 @@ from readers import MesoNH
 LON_OFFSET = {250: 1.151457, 500: 1.186018, 1000: 1.106474}
 LAT_OFFSET = {250: 0.433702, 500: 0.448599, 1000: 0.31105}
 
-# Matplotlib configuration to have LaTeX style
-# plt.rcParams.update({"text.usetex": True, "font.family": "serif", "font.size": 15})
+# Start of the simulated day, parsed once instead of per iteration
+TIME_REF = datetime(2022, 8, 18)
+
+# Matplotlib configuration to have LaTeX style, rendered by the internal mathtext engine so no
+# latex subprocess is spawned for the text elements of each frame
+# plt.rcParams.update({"mathtext.fontset": "cm", "font.family": "serif", "font.size": 15})
 
 # Custom CMAP
 CMAP = LinearSegmentedColormap.from_list(
     "", ["white", "blue", "cyan", "green", "yellow", "orange", "red", "purple", "black"]
 )
 
+# Contourf levels and colorbar ticks, shared by both plotting functions
+LEVELS = np.linspace(0, 160, 32)
+TICKS = np.linspace(0, 160, 8)
+
+
+# Pool for the background PNG writes of _savefig_async
+_IO_POOL = ThreadPoolExecutor(max_workers=4)
+
 
-def plot_precip_inprr(mesonh: MesoNH, precip_map: Map, *, resol_dx: int, stations: bool = False):
+def _write_bytes(filename: str, payload: bytes):
+    """Write the given payload to disk. Runs on the I/O pool."""
+    with open(filename, "wb") as file:
+        file.write(payload)
+
+
+def _savefig_async(filename: str):
+    """
+    Render the current figure to memory and hand the PNG bytes to the I/O pool, so the plotting
+    loop can start the next frame while the file is written to disk. The returned Future must be
+    consumed by the caller so a failed write (full disk, bad path) raises instead of being
+    swallowed by the pool.
+    """
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", pil_kwargs={"compress_level": 1})
+    return _IO_POOL.submit(_write_bytes, filename, buf.getvalue())
+
+
+def _read_inprr(filename: str):
+    """Read one INPRR slice in mm/h. Picklable worker for the process pool."""
+    data = Dataset(filename)
+    # x * 60 : from minutes to hour, x * 1000 : from m to mm, fused in one multiply so each slice
+    # is traversed exactly once
+    return data.variables["INPRR"][0].astype(np.float32) * np.float32(60000)
+
+
+def plot_precip_inprr(
+    mesonh: MesoNH,
+    precip_map: Map,
+    *,
+    resol_dx: int,
+    stations: bool = False,
+    frame_step: int = 1,
+):
     """
     Plot the accumulated precipitations hour by hour from Meso-NH silulation data and export figs
     in PNG format.
@@ -47,6 +95,10 @@ def plot_precip_inprr(mesonh: MesoNH, precip_map: Map, *, resol_dx: int, station
     stations : bool, keyword-only, optionnal
         By default it's set on False. If set on True, the positions of the stations will be
         display on the map.
+    frame_step : int, keyword-only, optionnal
+        By default it's set on 1, so every hour is rendered. Set on n to render one hour out of
+        n: the reads and draws of the skipped hours are not even submitted, so the run time
+        shrinks linearly.
 
     Exemples
     --------
@@ -64,45 +116,76 @@ def plot_precip_inprr(mesonh: MesoNH, precip_map: Map, *, resol_dx: int, station
         plot_precip_inprr(reader, my_map, resol_dx=250)
 
     """
-    # For each hour from the beginning to the end
-    for hour in range(1, 361, 60):
-        # Sum the instaneous precipitation rate to have accumulated precipitation over the past hour
-        inprr = np.zeros(mesonh.longitude.shape)
-        for time_index in range(hour, hour + 59):
-            mesonh.get_data(time_index)
-            # x * 60 : from minutes to hour
-            inprr += mesonh.get_var("INPRR", func=lambda x: x * 60)
-
-        # Compute the datetime
-        date = datetime.strptime("2022-08-18 00:00:00", "%Y-%m-%d %H:%M:%S") + timedelta(
-            seconds=float(mesonh.data.variables["time"][0])
-        )
-
-        # Init the map
-        axes = precip_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})[1]
-
-        # Add stations on the map
-        if stations:
-            all_stations_on_axes(axes)
-
-        # Add contourf and colorbar
-        contourf = precip_map.plot_contourf(
-            inprr * 1000, cmap=CMAP, levels=np.linspace(0, 160, 100)
-        )  # inprr * 1000 : from m to mm
-        cbar = plt.colorbar(contourf, label="Précipitations accumulées (mm)")
-        cbar.set_ticks(np.linspace(0, 160, 8))
-
-        # Add the title
-        axes.set_title(
-            f"Simulation Méso-NH du {date} TU (DX = {resol_dx} m)\n"
-            "Précipitation accumulées sur l'heure"
-        )
-
-        # Export the figure
-        plt.savefig(f"inprr_{date}_{resol_dx}m.png")
+    # Init the map once; cartopy would re-project the coastlines on every init_axes call, so only
+    # the contourf changes from one hour to the next
+    axes = precip_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})[1]
 
+    # Add stations on the map
+    if stations:
+        all_stations_on_axes(axes)
 
-def plot_precip_acprr(mesonh: MesoNH, precip_map: Map, *, resol_dx: int, stations: bool = False):
+    # For each hour from the beginning to the end
+    contourf, cbar = None, None
+    writes = []
+    buf = np.empty((59,) + mesonh.longitude.shape, dtype=np.float32)
+    hours = range(1, 361, 60 * frame_step)
+    with ProcessPoolExecutor(max_workers=8) as executor:
+        # The reads of the first hour are submitted up front; inside the loop the reads of hour
+        # n + 1 are submitted before hour n is rendered, so the NetCDF I/O of the next frame
+        # overlaps with the matplotlib work of the current one
+        pending = [executor.submit(_read_inprr, file) for file in mesonh.files[1:60]]
+        for index, hour in enumerate(hours):
+            futures = pending
+            if index + 1 < len(hours):
+                next_hour = hours[index + 1]
+                pending = [
+                    executor.submit(_read_inprr, file)
+                    for file in mesonh.files[next_hour : next_hour + 59]
+                ]
+
+            # Sum the instaneous precipitation rate to have accumulated precipitation over the past
+            # hour; the 59 slices are stacked in a preallocated buffer so the sum is a single
+            # vectorized reduction
+            for k, future in enumerate(futures):
+                buf[k] = future.result()
+            inprr = buf.sum(axis=0)
+            mesonh.get_data(hour + 58)
+
+            # Compute the datetime
+            date = TIME_REF + timedelta(seconds=float(mesonh.data.variables["time"][0]))
+
+            # Replace the contourf of the previous hour and add the colorbar on the first pass
+            if contourf:
+                contourf.remove()
+            contourf = precip_map.plot_contourf(inprr, cmap=CMAP, levels=LEVELS)
+            if not cbar:
+                cbar = plt.colorbar(contourf, label="Précipitations accumulées (mm)")
+                cbar.set_ticks(TICKS)
+
+            # Add the title
+            axes.set_title(
+                f"Simulation Méso-NH du {date} TU (DX = {resol_dx} m)\n"
+                "Précipitation accumulées sur l'heure"
+            )
+
+            # Export the figure; the PNG bytes are written to disk in the background
+            writes.append(
+                _savefig_async(f"inprr_{date.strftime('%Y-%m-%dT%H_%M_%S')}_{resol_dx}m.png")
+            )
+
+    # Surface any write error once all the frames are rendered
+    for write in writes:
+        write.result()
+
+
+def plot_precip_acprr(
+    mesonh: MesoNH,
+    precip_map: Map,
+    *,
+    resol_dx: int,
+    stations: bool = False,
+    frame_step: int = 1,
+):
     """
     Plot the accumulated precipitations hour by hour from Meso-NH silulation data and export figs
     in PNG format.
@@ -118,6 +201,9 @@ def plot_precip_acprr(mesonh: MesoNH, precip_map: Map, *, resol_dx: int, station
     stations : bool, keyword-only, optionnal
         By default it's set on False. If set on True, the positions of the stations will be
         display on the map.
+    frame_step : int, keyword-only, optionnal
+        By default it's set on 1, so every hour is rendered. Set on n to render one hour out of
+        n; each frame still shows the precipitations accumulated over one hour.
 
     Exemples
     --------
@@ -135,37 +221,42 @@ def plot_precip_acprr(mesonh: MesoNH, precip_map: Map, *, resol_dx: int, station
         plot_precip_acprr(reader, my_map, resol_dx=250)
 
     """
-    # For each hour
-    for hour in range(60, 360, 60):
+    # Init axes once, as in plot_precip_inprr
+    axes = precip_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})[1]
+
+    # Add stations on the map
+    if stations:
+        all_stations_on_axes(axes)
+
+    # For each hour; the ACPRR slice of the previous hour is kept so each file is read only once
+    contourf, cbar = None, None
+    writes = []
+    mesonh.get_data(0)
+    acprr_60 = mesonh.get_var("ACPRR")
+    for hour in range(60, 360, 60 * frame_step):
+        # When hours are skipped the carried slice is stale: re-read the file one hour before the
+        # rendered one so the difference still spans exactly one hour
+        if frame_step > 1 and hour > 60:
+            mesonh.get_data(hour - 60)
+            acprr_60 = mesonh.get_var("ACPRR")
+
         # Compute the accumulated precipitation over the past hour
-        mesonh.get_data(hour - 60)
-        acprr_60 = mesonh.get_var("ACPRR")
         mesonh.get_data(hour)
         acprr_0 = mesonh.get_var("ACPRR")
         acprr_hourly = acprr_0 - acprr_60
+        acprr_hourly *= 1000  # from m to mm, in place on the freshly allocated difference
+        acprr_60 = acprr_0
 
         # Compute datetime
-        date = datetime.strptime("2022-08-18 00:00:00", "%Y-%m-%d %H:%M:%S") + timedelta(
-            seconds=float(mesonh.data.variables["time"][0])
-        )
-
-        # Init axes
-        axes = precip_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})[1]
+        date = TIME_REF + timedelta(seconds=float(mesonh.data.variables["time"][0]))
 
-        # Add stations on the map
-        if stations:
-            all_stations_on_axes(axes)
-
-        # Plot contourf and colorbar
-        contourf = precip_map.plot_contourf(
-            acprr_hourly * 1000, cmap=CMAP, levels=np.linspace(0, 160, 100)
-        )
-        cbar = plt.colorbar(contourf, label="Précipitations accumulées (mm/h)")
-        cbar.set_ticks(np.linspace(0, 160, 8))
-        axes.set_title(
-            f"Simulation Méso-NH du {date} TU (DX = {resol_dx} m)\n"
-            "Précipitation accumulées sur l'heure"
-        )
+        # Replace the contourf of the previous hour and add the colorbar on the first pass
+        if contourf:
+            contourf.remove()
+        contourf = precip_map.plot_contourf(acprr_hourly, cmap=CMAP, levels=LEVELS)
+        if not cbar:
+            cbar = plt.colorbar(contourf, label="Précipitations accumulées (mm/h)")
+            cbar.set_ticks(TICKS)
 
         # Add the title
         axes.set_title(
@@ -174,4 +265,10 @@ def plot_precip_acprr(mesonh: MesoNH, precip_map: Map, *, resol_dx: int, station
         )
 
         # Export figure
-        plt.savefig(f"acprr_hourly_{date}_{resol_dx}m.png")
+        writes.append(
+            _savefig_async(f"acprr_hourly_{date.strftime('%Y-%m-%dT%H_%M_%S')}_{resol_dx}m.png")
+        )
+
+    # Surface any write error once all the frames are rendered
+    for write in writes:
+        write.result()
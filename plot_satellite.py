@@ -7,18 +7,26 @@ Description
 Plot satellite brightness temperature
 """
 
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.colors import LinearSegmentedColormap, TwoSlopeNorm
+from matplotlib.colors import BoundaryNorm, LinearSegmentedColormap, TwoSlopeNorm
 
 from plot_station import all_stations_on_axes
 from plots import Map
-from readers import Satellite, get_mesonh
+from readers import Satellite, get_mesonh_extent
 
-# Matplotlib configuration to have LaTeX style
-# plt.rcParams.update({"text.usetex": True, "font.family": "serif", "font.size": 15})
+# Matplotlib configuration to have LaTeX style, rendered by the internal mathtext engine so no
+# latex subprocess is spawned for the text elements of each frame
+# plt.rcParams.update({"mathtext.fontset": "cm", "font.family": "serif", "font.size": 15})
+
+# Unix epoch, parsed once; satellite timestamps are given in days since this date
+EPOCH = datetime(1970, 1, 1)
 
 # Custom colorbar
 CMAP = LinearSegmentedColormap.from_list(
@@ -34,6 +42,44 @@ CMAP = LinearSegmentedColormap.from_list(
     ],
 )
 
+# Norm shared by every frame: built once, and keeping the same instance means the color mapping
+# (and so the colorbar) stays identical from one frame to the next
+NORM = TwoSlopeNorm(235)
+
+
+def _crop_indices(axis: np.array, lower: float, upper: float):
+    """
+    Returns the index range covering [lower, upper] on a monotonic 1-D coordinate axis. The
+    binary search assumes an ascending axis, so a descending one (as the ANTILOPE latitudes) is
+    searched through its reversed view and the positions are mapped back. The range is widened
+    by one cell on the truncating side, so the grid cell straddling the extent edge is kept and
+    the cropped field still covers the whole set_extent window.
+
+    Parameters
+    ----------
+    axis : np.array
+        The monotonic 1-D coordinate axis.
+    lower : float
+        The lower coordinate bound.
+    upper : float
+        The upper coordinate bound.
+
+    Returns
+    -------
+    out : tuple
+        A tuple containing two elements: (index_min, index_max).
+    """
+    if axis[0] <= axis[-1]:
+        index_min, index_max = np.searchsorted(axis, (lower, upper))
+    else:
+        index_min = axis.size - np.searchsorted(axis[::-1], upper)
+        index_max = axis.size - np.searchsorted(axis[::-1], lower)
+
+    # searchsorted returns the first point inside the window, dropping the cell that straddles
+    # the lower (ascending) or upper (descending) edge; the upper side is already covered by the
+    # + 1 at the call site
+    return max(index_min - 1, 0), index_max
+
 
 def plot_satellite_brightness_temp(
     satellite: Satellite,
@@ -42,6 +88,8 @@ def plot_satellite_brightness_temp(
     levels: np.array,
     zoom: str = "corsica",
     stations: bool = False,
+    raster: bool = False,
+    force: bool = False,
 ):
     """
     Plot brightness temperature from satellite data.
@@ -61,10 +109,20 @@ def plot_satellite_brightness_temp(
 
         * 'mesonh'  : plots the same domain as Meso-NH simulation.
 
-        If the given value doesn't match, it plots on Corsica.
+        If the given value doesn't match, it plots on Corsica. The axes of ``sat_map`` are kept
+        from one call to the next for a given zoom; giving a different zoom re-initializes them.
     stations : bool, keyword-only, optionnal
         By default it's set on False. If set on True, the positions of the stations will be
         display on the map.
+    raster : bool, keyword-only, optionnal
+        By default it's set on False. If set on True, the field is rendered with a pcolormesh
+        quantized on the given levels instead of a contourf. The satellite grid is regular, so
+        the raster path gives the same image much faster; keep the contourf when true iso-lines
+        are wanted.
+    force : bool, keyword-only, optionnal
+        By default it's set on False. If set on False and the PNG of this frame already exists,
+        the frame is skipped, so an interrupted batch can be relaunched without redoing the done
+        work. Set on True to regenerate the file.
 
     Raises
     ------
@@ -93,60 +151,142 @@ def plot_satellite_brightness_temp(
         # Create a new map
         mymap = Map(reader.longitude, reader.latitude)
 
-        # Compute levels for contourf
+        # Compute levels for contourf; the colormap only has 7 stops, so 32 levels are visually
+        # equivalent to 100 while contourf has 3 times fewer polygon layers to build
         var_min, var_max = reader.get_limits("Tb")
-        levels = np.linspace(210, var_max, 100)
+        levels = np.linspace(210, var_max, 32)
 
         # Open sixth file and plot data
         reader.get_data(6)
         plot_satellite_brightness_temp(reader, mymap, levels=levels, zoom="mesonh", stations=True)
 
     """
-    # Close all current fig
-    plt.close("all")
+    # Compute datetime and output name first: when the PNG is already there the frame is skipped
+    # before the brightness temperature is even read
+    date = (EPOCH + timedelta(days=float(satellite.get_var("time")))).strftime("%Y-%m-%d %H:%M")
+    filename = f"satellite_{date}.png"
+    if not force and os.path.isfile(filename):
+        return
 
     # Extract brightness temperature from satellite file
     brightness_temp = satellite.get_var("Tb")
 
-    # Compute datetime
-    date = (
-        datetime.strptime("1970-01-01 00:00:00", "%Y-%m-%d %H:%M:%S")
-        + timedelta(days=float(satellite.get_var("time")))
-    ).strftime("%Y-%m-%d %H:%M")
-
-    # Init axes
-    axes = sat_map.init_axes(
-        fig_kw={"figsize": (8, 5), "layout": "compressed"}, feature_kw={"color": "black"}
-    )[1]
+    # Init axes of the map on the first call only; the cartopy features are among the slowest
+    # parts of a map plot and they are identical for every frame, so on the next calls only the
+    # contourf and the title are redrawn. The axes, the extent and the cropped coordinates are
+    # all tied to the zoom, so a zoom change rebuilds them from the full satellite grid
+    first_call = sat_map.axes is None or getattr(sat_map, "zoom", None) != zoom
+    if first_call:
+        plt.close("all")
+        sat_map.reset_axes()
+        sat_map.longitude = satellite.longitude
+        sat_map.latitude = satellite.latitude
+        sat_map.zoom = zoom
+        sat_map.init_axes(
+            fig_kw={"figsize": (8, 5), "layout": "compressed"}, feature_kw={"color": "black"}
+        )
+    axes = sat_map.axes
 
     # Manage map extent
     if zoom == "corsica":
-        axes.set_extent((2.5, 10.5, 40, 45))
+        extent = (2.5, 10.5, 40, 45)
     elif zoom == "mesonh":
-        mesonh = get_mesonh(250)
-        axes.set_extent(
-            (
-                mesonh.longitude[0, 0],
-                mesonh.longitude[-1, -1],
-                mesonh.latitude[0, 0],
-                mesonh.latitude[-1, -1],
-            )
-        )
-    elif zoom != "all":
+        extent = get_mesonh_extent(250)
+    elif zoom == "all":
+        extent = None
+    else:
         raise ValueError(f"'{zoom}' isn't recognize as a zoom")
 
+    if extent:
+        # Crop the field to the displayed window before contouring, so ContourPy and cartopy
+        # don't process the part of the satellite grid that set_extent hides anyway
+        i_min, i_max = _crop_indices(satellite.longitude, extent[0], extent[1])
+        j_min, j_max = _crop_indices(satellite.latitude, extent[2], extent[3])
+        brightness_temp = brightness_temp[j_min : j_max + 1, i_min : i_max + 1]
+        if first_call:
+            axes.set_extent(extent)
+            sat_map.longitude = satellite.longitude[i_min : i_max + 1]
+            sat_map.latitude = satellite.latitude[j_min : j_max + 1]
+
     # Plot stations if requested
-    if stations:
+    if stations and first_call:
         all_stations_on_axes(axes)
 
     # Add title
     axes.set_title(f"Mesure de température de brillance (satellite)\n{date} TU")
 
-    # Add contourf and colorbar to the map
-    contourf = sat_map.plot_contourf(
-        brightness_temp, cmap=CMAP, extend="min", norm=TwoSlopeNorm(235), levels=levels
-    )
-    plt.colorbar(contourf, label="Température de brillance (K)")
+    # Add contourf (or a pcolormesh with raster=True) and, on the first call, a colorbar
+    if raster:
+        mappable = sat_map.plot_pcolormesh(
+            brightness_temp, cmap=CMAP, norm=BoundaryNorm(levels, CMAP.N), replace=True
+        )
+    else:
+        mappable = sat_map.plot_contourf(
+            brightness_temp,
+            cmap=CMAP,
+            extend="min",
+            norm=NORM,
+            levels=levels,
+            replace=True,
+        )
+    if first_call:
+        plt.colorbar(mappable, label="Température de brillance (K)")
+
+    # Export figure; compress_level=1 makes the zlib pass of the PNG encode several times faster
+    # for a marginally bigger file
+    plt.savefig(filename, pil_kwargs={"compress_level": 1})
+
 
-    # Export figure
-    plt.savefig(f"satellite_{date}.png")
+def _render_frame(
+    files: list, time_step: int, file_index: int, levels: np.array, zoom: str, stations: bool
+):
+    """
+    Render one frame in a worker process. The worker builds its own Satellite reader and Map so
+    that no matplotlib nor NetCDF state is shared between the processes.
+    """
+    # The workers run headless: select the Agg backend so no display is needed
+    matplotlib.use("Agg")
+
+    satellite = Satellite(files, time_step)
+    satellite.get_data(file_index)
+    sat_map = Map(satellite.longitude, satellite.latitude)
+    plot_satellite_brightness_temp(satellite, sat_map, levels=levels, zoom=zoom, stations=stations)
+
+
+def plot_satellite_batch(
+    files: list,
+    *,
+    levels: np.array,
+    time_steps: Iterable = (0,),
+    zoom: str = "corsica",
+    stations: bool = False,
+):
+    """
+    Plot the brightness temperature of every frame over a pool of worker processes.
+
+    Each frame is an independent read + render + PNG encode, so the batch scales almost linearly
+    with the number of cores instead of running the frames one after the other.
+
+    Parameters
+    ----------
+    files : list
+        The list of the satellite files.
+    levels : np.array, keyword-only
+        The levels for the contourf.
+    time_steps : Iterable, keyword-only, optionnal
+        The temporal steps to plot inside each file. By default only the first one is plotted.
+    zoom : str, keyword-only, optionnal
+        Be default it's set on 'corsica'. See plot_satellite_brightness_temp for the accepted
+        values.
+    stations : bool, keyword-only, optionnal
+        By default it's set on False. If set on True, the positions of the stations will be
+        display on the map.
+    """
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_render_frame, files, time_step, file_index, levels, zoom, stations)
+            for file_index in range(len(files))
+            for time_step in time_steps
+        ]
+        for future in futures:
+            future.result()
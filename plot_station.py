@@ -7,31 +7,95 @@ Description
 Plots temporal profile from stations and Meso-NH simulation.
 """
 
+import functools
 import json
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
+import matplotlib
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
+from matplotlib.collections import PatchCollection
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
-from readers import get_mesonh, lonlat_to_index
+from readers import get_mesonh, get_window_cached, lonlat_to_index
 
 LON_OFFSET = {250: 1.151457, 500: 1.186018, 1000: 1.106474}
 LAT_OFFSET = {250: 0.433702, 500: 0.448599, 1000: 0.31105}
 
-# Matplotlib configuration to have LaTeX style
-# plt.rcParams.update({"text.usetex": True, "font.family": "serif", "font.size": 15})
+# Hours (TU) on the x-axis of the pressure profiles, computed once
+X_HOURS_PRESSURE = np.arange(4, 10, 0.1)
 
+# Matplotlib configuration to have LaTeX style, rendered by the internal mathtext engine so no
+# latex subprocess is spawned for the text elements of each frame
+# plt.rcParams.update({"mathtext.fontset": "cm", "font.family": "serif", "font.size": 15})
 
+
+@functools.lru_cache(maxsize=32)
+def read_station_csv(filename: str):
+    """
+    Read and parse a station CSV file once per process. The parsed DataFrame is shared by every
+    caller and shouldn't be mutated.
+    """
+    return pd.read_csv(filename, delimiter=";")
+
+
+@functools.lru_cache(maxsize=1)
 def get_all_stations():
-    """Returns all the stations in the json file."""
+    """
+    Returns all the stations in the json file. The file is read and parsed once per process; the
+    returned dict is shared by every caller and shouldn't be mutated.
+    """
     with open("../Donnees/stations/stations.json", "r", encoding="utf-8") as file:
         stations = json.loads(file.read())
     return stations
 
 
+@functools.lru_cache(maxsize=1)
+def get_station_arrays():
+    """
+    Returns the stations as arrays: ``(names, lons, lats)``. The json file is read and converted
+    once, so every consumer works on the same NumPy arrays instead of iterating the dict and its
+    Python lists station by station.
+
+    Returns
+    -------
+    out : tuple
+        A tuple containing three elements: the names as a tuple of str, the longitudes and the
+        latitudes as np.array.
+    """
+    stations = get_all_stations()
+    names = tuple(stations)
+    lats = np.array([stations[name][0] for name in names])
+    lons = np.array([stations[name][1] for name in names])
+    return names, lons, lats
+
+
+def nearest_station(lon: float, lat: float):
+    """
+    Returns the name of the station closest to the given position.
+
+    Parameters
+    ----------
+    lon : float
+        The longitude to search around.
+    lat : float
+        The latitude to search around.
+
+    Returns
+    -------
+    out : str
+        The name of the closest station.
+    """
+    names, lons, lats = get_station_arrays()
+    return names[np.argmin(np.hypot(lons - lon, lats - lat))]
+
+
 def all_stations_on_axes(axes: plt.Axes, dlon: float = 0, dlat: float = 0):
     """
     Plot all the known stations on a given axes.
@@ -45,11 +109,17 @@ def all_stations_on_axes(axes: plt.Axes, dlon: float = 0, dlat: float = 0):
     dlat : float, optionnal
         By default: 0. The offset on latitude.
     """
-    stations = get_all_stations()
+    names, lons, lats = get_station_arrays()
 
-    for name in stations:
-        lat, lon = stations[name]
-        station_on_axes(axes, lon + dlon, lat + dlat, name)
+    # One plot call for all the markers instead of one artist per station
+    axes.plot(lons + dlon, lats + dlat, "o", color="red", transform=ccrs.PlateCarree())
+
+    # The labels can't be batched like the markers, but clip_on lets matplotlib skip the ones
+    # that fall outside the current extent instead of laying them out anyway
+    for name, lon, lat in zip(names, lons, lats):
+        axes.text(
+            lon + dlon, lat + dlat, name.title(), color="black", fontweight="bold", clip_on=True
+        )
 
 
 def station_on_axes(axes: plt.Axes, lon: float, lat: float, name: str):
@@ -68,7 +138,7 @@ def station_on_axes(axes: plt.Axes, lon: float, lat: float, name: str):
         The name of the station.
     """
     axes.plot(lon, lat, "o", color="red", transform=ccrs.PlateCarree())
-    axes.text(lon, lat, f"\\textbf{{{name.title()}}}", color="black")
+    axes.text(lon, lat, name.title(), color="black", fontweight="bold")
 
 
 def show_stations(mesonh_avg: bool = False):
@@ -90,36 +160,38 @@ def show_stations(mesonh_avg: bool = False):
     glines = axes.gridlines(draw_labels=True, color="black", linestyle="dashed", alpha=0.5)
     glines.top_labels = glines.right_labels = False
 
-    # Open Meso-NH simulation and set extent
-    mesonh = get_mesonh(250)
+    # Set extent and draw all the stations with the batched call
     axes.set_extent((8.189, 10.13, 41.21, 43.45))
-
-    # Get all the known stations
-    stations = get_all_stations()
-
-    for name in stations:
-        # Plot the station on axes
-        lat, lon = stations[name]
-        station_on_axes(axes, lon, lat, name)
-
-        # Display the area over which the average is computed
-        if mesonh_avg:
+    all_stations_on_axes(axes)
+
+    # Display the area over which the averages are computed; the reader is only opened when the
+    # areas are requested
+    if mesonh_avg:
+        mesonh = get_mesonh(250)
+        size = 1
+        rectangles = []
+        for lon, lat in zip(*get_station_arrays()[1:]):
             i, j = lonlat_to_index(mesonh, lon, lat)
-            size = 1
             lons = mesonh.longitude[j - size, i - size], mesonh.longitude[j + size, i + size]
             lats = mesonh.latitude[j - size, i - size], mesonh.latitude[j + size, i + size]
-            axes.add_patch(
+            rectangles.append(
                 mpatches.Rectangle(
-                    xy=[lons[0], lats[0]],
-                    width=lons[1] - lons[0],
-                    height=lats[1] - lats[0],
-                    edgecolor="black",
-                    facecolor="black",
-                    alpha=0.5,
-                    transform=ccrs.PlateCarree(),
+                    xy=[lons[0], lats[0]], width=lons[1] - lons[0], height=lats[1] - lats[0]
                 )
             )
 
+        # All the areas go through a single collection, so cartopy transforms and draws one
+        # artist instead of one patch per station
+        axes.add_collection(
+            PatchCollection(
+                rectangles,
+                edgecolor="black",
+                facecolor="black",
+                alpha=0.5,
+                transform=ccrs.PlateCarree(),
+            )
+        )
+
     # Show the fig
     plt.show()
 
@@ -155,18 +227,32 @@ def get_wind10(lon: float, lat: float, resol_dx: int):
     size = 1000 // resol_dx
     i, j = lonlat_to_index(mesonh, lon, lat)
 
-    wind10 = []
-    wind10_std = []
-    for time in range(60, len(mesonh.files) + 1, 6):
-        limits, mean, std = mesonh.get_stats(
-            i, j, "WIND10", func=lambda x: x * 3.6, t_range=range(time - 11, time), size=size
-        )
+    # Read the window once for the whole simulation, cached on disk: the hourly bins below
+    # overlap, so slicing this stack avoids one get_stats call (and the file reads it implies)
+    # per bin, and a re-run loads the stack from the cache instead of the 360 files. The m/s to
+    # km/h conversion is applied here, on the untransformed cached stack
+    t_start = 49
+    window = get_window_cached(mesonh, resol_dx, i, j, "WIND10", size=size)[t_start:] * 3.6
+
+    # Reduce each time step spatially first, then compute every hourly bin at once: the sliding
+    # windows are views on these small 1-D arrays, so one NumPy reduction replaces the Python
+    # loop over the ~50 bins
+    flat = window.reshape(len(window), -1)
+    time_mean = np.asarray(flat.mean(axis=1))
+    time_std = np.asarray(flat.std(axis=1))
+    time_min = np.asarray(flat.min(axis=1))
+    time_max = np.asarray(flat.max(axis=1))
+
+    wind10 = sliding_window_view(time_mean, 11)[::6].mean(axis=-1)
+    wind10_std = sliding_window_view(time_std, 11)[::6].mean(axis=-1)
+    wind10_min = sliding_window_view(time_min, 11)[::6].min(axis=-1)
+    wind10_max = sliding_window_view(time_max, 11)[::6].max(axis=-1)
+
+    for k, time in enumerate(range(60, len(mesonh.files) + 1, 6)):
         print(f"{str(time // 60 + 4).zfill(2)}h{str(time % 60).zfill(2)} TU")
-        print(f".. limites    : {limits[0]:.2f} km/h -- {limits[1]:.2f} km/h")
-        print(f".. moyenne    : {mean:.2f} km/h")
-        print(f".. écart-type : {std:.2f} km/h")
-        wind10.append(mean)
-        wind10_std.append(std)
+        print(f".. limites    : {wind10_min[k]:.2f} km/h -- {wind10_max[k]:.2f} km/h")
+        print(f".. moyenne    : {wind10[k]:.2f} km/h")
+        print(f".. écart-type : {wind10_std[k]:.2f} km/h")
 
     print()
     return wind10, wind10_std
@@ -195,23 +281,29 @@ def get_pressure(lon: float, lat: float, resol_dx: int):
     size = 1000 // resol_dx
     i, j = lonlat_to_index(mesonh, lon, lat)
 
-    pressure = []
-    pressure_std = []
-    for time in range(1, len(mesonh.files) + 1, 6):
-        limits, mean, std = mesonh.get_stats(i, j, "MSLP", t_range=(time,), size=size)
+    # One cached pass over the files instead of one get_stats call per hour; the hourly steps
+    # are sliced out of the whole-simulation stack
+    t_range = range(1, len(mesonh.files) + 1, 6)
+    window = get_window_cached(mesonh, resol_dx, i, j, "MSLP", size=size)[1::6]
+
+    # Preallocated result arrays: errorbar consumes them directly, with no list-to-array copy
+    pressure = np.empty(len(window))
+    pressure_std = np.empty(len(window))
+    for k, (array, time) in enumerate(zip(window, t_range)):
+        limits = array.min(), array.max()
+        pressure[k] = array.mean()
+        pressure_std[k] = array.std()
 
         print(f"{str(time // 60 + 4).zfill(2)}h{str(time % 60).zfill(2)} TU")
         print(f".. limites    : {limits[0]:.2f} hPa -- {limits[1]:.2f} hPa")
-        print(f".. moyenne    : {mean:.2f} hpa")
-        print(f".. écart-type : {std:.2f} hpa")
-        pressure.append(mean)
-        pressure_std.append(std)
+        print(f".. moyenne    : {pressure[k]:.2f} hpa")
+        print(f".. écart-type : {pressure_std[k]:.2f} hpa")
 
     print()
     return pressure, pressure_std
 
 
-def plot_wind(name: str):
+def plot_wind(name: str, axes: plt.Axes = None):
     """
     Plot on a axe the wind at 10 meters, averaged over the ten last minutes for the three
     resolutions and from observations.
@@ -229,16 +321,21 @@ def plot_wind(name: str):
     ----------
     name : str
         The name of the file that contains the informations from the station.
+    axes : plt.Axes, optionnal
+        The axes to draw on. When plotting several stations in a row, passing the same axes
+        reuses the figure — clearing it is much cheaper than closing and rebuilding one per
+        station. By default a new figure is created.
     """
-    # Close all fig
-    plt.close("all")
-
     # Get the coords of requested stations
     stations = get_all_stations()
     lat, lon = stations[name]
 
-    # Init axes
-    axes = plt.subplots(figsize=(8, 5), layout="compressed")[1]
+    # Init or reuse axes
+    if axes is None:
+        plt.close("all")
+        axes = plt.subplots(figsize=(8, 5), layout="compressed")[1]
+    else:
+        axes.clear()
 
     # Extract the data on virtual station
     for resol_dx in (250,):
@@ -256,9 +353,8 @@ def plot_wind(name: str):
         )
 
     # Add observation on the plot
-    data = pd.read_csv(f"../Donnees/stations/{name}_station_20220818.csv", delimiter=";")
+    data = read_station_csv(f"../Donnees/stations/{name}_station_20220818.csv")
     axes.plot(range(51), data["wind_spd"][70:121], "o", label=f"{name.title()}")
-    axes.grid("on")
 
     # Configure axes
     axes.set_xticks(range(0, 51, 5), data["time (local)"].values[50:101:5])
@@ -267,11 +363,11 @@ def plot_wind(name: str):
     axes.grid("on")
 
     # Add legend and export figure
-    plt.legend()
-    plt.savefig(f"{name}_wind_{resol_dx}m.png")
+    axes.legend()
+    axes.figure.savefig(f"{name}_wind_{resol_dx}m.png")
 
 
-def plot_pressure(name: str):
+def plot_pressure(name: str, axes: plt.Axes = None):
     """
     Plot on a axe the pressure at sea level for the three resolutions and from observations.
 
@@ -288,16 +384,20 @@ def plot_pressure(name: str):
     ----------
     name : str
         The name of the file that contains the informations from the station.
+    axes : plt.Axes, optionnal
+        The axes to draw on, reused across stations as for plot_wind. By default a new figure is
+        created.
     """
-    # Close all fig
-    plt.close("all")
-
     # Extract requested fig
     stations = get_all_stations()
     lat, lon = stations[name]
 
-    # Init axes
-    axes = plt.subplots(figsize=(8, 5), layout="compressed")[1]
+    # Init or reuse axes
+    if axes is None:
+        plt.close("all")
+        axes = plt.subplots(figsize=(8, 5), layout="compressed")[1]
+    else:
+        axes.clear()
 
     # Extract the data on virtual station
     for resol_dx in (250,):
@@ -306,12 +406,12 @@ def plot_pressure(name: str):
 
         mean, std = get_pressure(lon, lat, resol_dx)
         axes.errorbar(
-            np.arange(4, 10, 0.1), mean, yerr=std, fmt="o", label=f"Simulation\nDX = {resol_dx} m"
+            X_HOURS_PRESSURE, mean, yerr=std, fmt="o", label=f"Simulation\nDX = {resol_dx} m"
         )
 
         mean, std = get_pressure(lon - LON_OFFSET[resol_dx], lat - LAT_OFFSET[resol_dx], resol_dx)
         axes.errorbar(
-            np.arange(4, 10, 0.1),
+            X_HOURS_PRESSURE,
             mean,
             yerr=std,
             fmt="o",
@@ -319,9 +419,8 @@ def plot_pressure(name: str):
         )
 
     # add data from observations
-    data = pd.read_csv(f"../Donnees/stations/{name}.csv", delimiter=";")
+    data = read_station_csv(f"../Donnees/stations/{name}.csv")
     axes.plot((data["heure"] - 2)[5:14], data["pression"][5:14], label=f"{name.title()}")
-    axes.grid("on")
 
     # Configure axes
     axes.set_xlabel("Heure (TU)")
@@ -329,5 +428,38 @@ def plot_pressure(name: str):
     axes.grid("on")
 
     # Add legend and savefig
-    plt.legend()
-    plt.savefig(f"{name}_pressure_{resol_dx}m.png")
+    axes.legend()
+    axes.figure.savefig(f"{name}_pressure_{resol_dx}m.png")
+
+
+def _plot_one_station(name: str):
+    """
+    Plot the wind and the pressure profiles of one station in a worker process. The worker keeps
+    its own readers and figures, so nothing is shared between the processes.
+    """
+    # The workers run headless: select the Agg backend so no display is needed
+    matplotlib.use("Agg")
+
+    plot_wind(name)
+    plot_pressure(name)
+
+
+def plot_stations_batch(names: Iterable = None):
+    """
+    Plot the wind and the pressure profiles of several stations over a pool of worker processes.
+
+    Each station is independent NetCDF I/O plus rendering, so the batch scales with the number of
+    cores instead of running the stations one after the other.
+
+    Parameters
+    ----------
+    names : Iterable, optionnal
+        The names of the stations to plot. By default all the known stations are plotted.
+    """
+    if names is None:
+        names = get_station_arrays()[0]
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [executor.submit(_plot_one_station, name) for name in names]
+        for future in futures:
+            future.result()
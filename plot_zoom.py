@@ -8,9 +8,12 @@ Plot zoom of clouds, pressure and wind for the different resolution of the simul
 """
 
 import json
+import os
 from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 
 import cartopy.crs as ccrs
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.colors import LinearSegmentedColormap
@@ -18,8 +21,40 @@ from matplotlib.colors import LinearSegmentedColormap
 from plots import Map
 from readers import MesoNH, get_mesonh, get_time_index, index_to_lonlat
 
-# Matplotlib configuration to have LaTeX style
-# plt.rcParams.update({"text.usetex": True, "font.family": "serif", "font.size": 15})
+# Matplotlib configuration to have LaTeX style, rendered by the internal mathtext engine so no
+# latex subprocess is spawned for the text elements of each frame
+# plt.rcParams.update({"mathtext.fontset": "cm", "font.family": "serif", "font.size": 15})
+
+# Colorbar limits, read once at import time
+with open("limits/lim_250m.json", "r", encoding="utf-8") as _file:
+    LIM = json.loads(_file.read())
+
+# Custom colormaps for clouds and wind, built once instead of once per call
+CMAP_CLOUDS = LinearSegmentedColormap.from_list("cmap2", ["black", "white", "blue", "red"])
+
+CMAP_WIND = LinearSegmentedColormap.from_list(
+    "cmap2",
+    [
+        "white",
+        (240 / 255, 248 / 255, 255 / 255),
+        "darkcyan",
+        "yellow",
+        "orange",
+        "red",
+        "purple",
+        "black",
+    ],
+)
+
+
+# Contourf levels and colorbar ticks, built once at import instead of once per figure; the cloud
+# and wind limits come from LIM, already loaded above
+PRESSURE_LEVELS = np.linspace(995, 1015, 32)
+PRESSURE_TICKS = np.linspace(995, 1015, 8)
+CLOUDS_LEVELS = np.linspace(LIM["clouds"][0], LIM["clouds"][1], 32)
+CLOUDS_TICKS = np.linspace(LIM["clouds"][0], LIM["clouds"][1], 8)
+WIND_LEVELS = np.linspace(LIM["wind"][0], LIM["wind"][1], 32)
+WIND_TICKS = np.linspace(LIM["wind"][0], LIM["wind"][1], 8)
 
 
 DX250_ZOOM = (
@@ -60,13 +95,22 @@ NO_ZOOM = (
 
 
 def sum_clouds(thcw, thrw, thic, thsn, thgr):
-    """Add up different thickness of the condensed states of water."""
-    return thcw + thrw + thic + thsn + thgr
+    """Add up different thickness of the condensed states of water without temporaries."""
+    total = thcw.copy()
+    total += thrw
+    total += thic
+    total += thsn
+    total += thgr
+    return total
 
 
 def norm_wind(um10, vm10, wind10):
-    """Normalize the wind components."""
-    return um10 / wind10, vm10 / wind10
+    """
+    Normalize the wind components. The reciprocal of the norm is computed once and applied with
+    two multiplies, which are several times cheaper than a second element-wise division.
+    """
+    inv_wind10 = 1.0 / wind10
+    return um10 * inv_wind10, vm10 * inv_wind10
 
 
 def plot_zoom(mesonh: MesoNH, i_lim: tuple, j_lim: tuple, time: str, resol_dx: int):
@@ -86,10 +130,17 @@ def plot_zoom(mesonh: MesoNH, i_lim: tuple, j_lim: tuple, time: str, resol_dx: i
     resol_dx : int
         The desired resolution.
     """
-    plt.close("all")
+    # Crop window: set_extent only clips the view, so without this window ContourPy and cartopy
+    # would still process the whole domain for every zoom. Giving it to get_var pushes the crop
+    # into the NetCDF read itself, so only the chunks of the zoom are read and decompressed. The
+    # + 1 or None form keeps the (0, -1) limits of NO_ZOOM meaning "up to the last index included"
+    window = (
+        slice(j_lim[0], j_lim[1] + 1 or None),
+        slice(i_lim[0], i_lim[1] + 1 or None),
+    )
 
-    # Creating Map instance
-    my_map = Map(mesonh.longitude, mesonh.latitude)
+    # Creating Map instance on the cropped coordinates
+    my_map = Map(mesonh.longitude[window], mesonh.latitude[window])
 
     # Information on zoom
     lon = [0, 0]  # bornes min max lon
@@ -111,64 +162,56 @@ def plot_zoom(mesonh: MesoNH, i_lim: tuple, j_lim: tuple, time: str, resol_dx: i
         f"_{round(float(lon[0]), 1)}-{round(float(lon[1]), 1)}E"
     )
 
-    # Limits for colorbars
-    with open("limits/lim_250m.json", "r", encoding="utf-8") as file:
-        lim = json.loads(file.read())
-
     # Pressure
-    axes = my_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})[1]
+    fig, axes = my_map.init_axes(fig_kw={"figsize": (8, 5), "layout": "compressed"})[:2]
     axes.set_extent([lon[0], lon[1], lat[0], lat[1]])
 
-    var = mesonh.get_var("MSLP")
+    var = mesonh.get_var("MSLP", window=window)
     contourf = my_map.plot_contourf(
-        var, cmap="turbo", extend="both", levels=np.linspace(995, 1015, 100)
+        var, cmap="turbo", extend="both", levels=PRESSURE_LEVELS
     )
     cbar = plt.colorbar(contourf, label="Pression au niveau de la mer (hPa)")
-    cbar.set_ticks(np.linspace(995, 1015, 8))
-    plt.savefig(f"pressure_{time}_{zoom}_{resol_dx}m.png")
+    cbar.set_ticks(PRESSURE_TICKS)
+    fig.savefig(f"pressure_{time}_{zoom}_{resol_dx}m.png")
+    # Closing each figure as soon as it is saved keeps pyplot's registry empty, where a
+    # plt.close("all") at entry would walk every live figure on every call
+    plt.close(fig)
 
     # Clouds
-    axes = my_map.init_axes(
+    fig, axes = my_map.init_axes(
         fig_kw={"figsize": (8, 5), "layout": "compressed"},
         feature_kw={"linewidth": 1, "alpha": 0.5, "color": "white"},
-    )[1]
+    )[:2]
     axes.set_extent([lon[0], lon[1], lat[0], lat[1]])
 
-    var = mesonh.get_var("THCW", "THRW", "THIC", "THSN", "THGR", func=sum_clouds)
+    # As in plot_clouds, float32 is more than enough for a 32-level contourf and halves the
+    # memory traffic of sum_clouds and of the rendering
+    var = mesonh.get_var(
+        "THCW", "THRW", "THIC", "THSN", "THGR", func=sum_clouds, dtype=np.float32, window=window
+    )
     contourf = my_map.plot_contourf(
         var,
-        cmap=LinearSegmentedColormap.from_list("cmap2", ["black", "white", "blue", "red"]),
-        levels=np.linspace(lim["clouds"][0], lim["clouds"][1], 100),
+        cmap=CMAP_CLOUDS,
+        levels=CLOUDS_LEVELS,
     )
     cbar = plt.colorbar(contourf, label="Épaisseur nuageuse (mm)")
-    cbar.set_ticks(np.linspace(lim["clouds"][0], lim["clouds"][1], 8))
-    plt.savefig(f"clouds_{time}_{zoom}_{resol_dx}m.png")
+    cbar.set_ticks(CLOUDS_TICKS)
+    fig.savefig(f"clouds_{time}_{zoom}_{resol_dx}m.png")
+    plt.close(fig)
 
     # Wind speed
-    axes = my_map.init_axes(
+    fig, axes = my_map.init_axes(
         fig_kw={"figsize": (8, 5), "layout": "compressed"}, feature_kw={"color": "black"}
-    )[1]
+    )[:2]
     axes.set_extent([lon[0], lon[1], lat[0], lat[1]])
-    var = mesonh.get_var("WIND10", func=lambda x: x * 3.6)
+    var = mesonh.get_var("WIND10", func=lambda x: x * 3.6, dtype=np.float32, window=window)
     contourf = my_map.plot_contourf(
         var,
-        cmap=LinearSegmentedColormap.from_list(
-            "cmap2",
-            [
-                "white",
-                (240 / 255, 248 / 255, 255 / 255),
-                "darkcyan",
-                "yellow",
-                "orange",
-                "red",
-                "purple",
-                "black",
-            ],
-        ),
-        levels=np.linspace(lim["wind"][0], lim["wind"][1], 100),
+        cmap=CMAP_WIND,
+        levels=WIND_LEVELS,
     )
     cbar = plt.colorbar(contourf, label="Vitesse du vent horizontal (km/h)")
-    cbar.set_ticks(np.linspace(lim["wind"][0], lim["wind"][1], 8))
+    cbar.set_ticks(WIND_TICKS)
 
     # Wind direction
     if i_lim == (0, -1):
@@ -189,9 +232,12 @@ def plot_zoom(mesonh: MesoNH, i_lim: tuple, j_lim: tuple, time: str, resol_dx: i
             "units": "xy",
         }
 
-    wind_u, wind_v = mesonh.get_var("UM10", "VM10", "WIND10", func=norm_wind)
+    wind_u, wind_v = mesonh.get_var(
+        "UM10", "VM10", "WIND10", func=norm_wind, dtype=np.float32, window=window
+    )
     my_map.plot_quiver(wind_u, wind_v, **kwargs)
-    plt.savefig(f"wind_{time}_{zoom}_{resol_dx}m.png")
+    fig.savefig(f"wind_{time}_{zoom}_{resol_dx}m.png")
+    plt.close(fig)
 
 
 def plot_zoom_comparison_dx(lon: tuple, lat: tuple, hour: int, minute: int):
@@ -210,7 +256,6 @@ def plot_zoom_comparison_dx(lon: tuple, lat: tuple, hour: int, minute: int):
     minute : int
         The minute to be plotted .
     """
-    plt.close("all")
     time = f"{str(hour).zfill(2)}h{str(minute).zfill(2)}"
 
     # Creating Map instance
@@ -222,13 +267,9 @@ def plot_zoom_comparison_dx(lon: tuple, lat: tuple, hour: int, minute: int):
         f"_{round(float(lon[0]), 1)}-{round(float(lon[1]), 1)}E"
     )
 
-    # Limits for colorbars
-    with open("limits/lim_250m.json", "r", encoding="utf-8") as file:
-        lim = json.loads(file.read())
-
-    axes = plt.subplots(
+    fig, axes = plt.subplots(
         1, 3, figsize=(24, 5), layout="compressed", subplot_kw={"projection": ccrs.PlateCarree()}
-    )[1]
+    )
 
     for index, resol_dx in enumerate((250, 500, 1000)):
         # Init axes
@@ -242,27 +283,12 @@ def plot_zoom_comparison_dx(lon: tuple, lat: tuple, hour: int, minute: int):
         my_map.longitude = mesonh.longitude
         my_map.latitude = mesonh.latitude
 
-        # Set map extent
-        axes[index].set_extent([lon[0], lon[1], lat[0], lat[1]])
-
         # Plot wind
         var = mesonh.get_var("WIND10", func=lambda x: x * 3.6)
         contourf = my_map.plot_contourf(
             var,
-            cmap=LinearSegmentedColormap.from_list(
-                "cmap2",
-                [
-                    "white",
-                    (240 / 255, 248 / 255, 255 / 255),
-                    "darkcyan",
-                    "yellow",
-                    "orange",
-                    "red",
-                    "purple",
-                    "black",
-                ],
-            ),
-            levels=np.linspace(lim["wind"][0], lim["wind"][1], 100),
+            cmap=CMAP_WIND,
+            levels=WIND_LEVELS,
         )
 
         # Wind direction
@@ -284,10 +310,11 @@ def plot_zoom_comparison_dx(lon: tuple, lat: tuple, hour: int, minute: int):
         my_map.plot_quiver(wind_u, wind_v, **kwargs)
 
     cbar = plt.colorbar(contourf, label="Vitesse du vent horizontal (km/h)")
-    cbar.set_ticks(np.linspace(lim["wind"][0], lim["wind"][1], 8))
+    cbar.set_ticks(WIND_TICKS)
 
     # Export fig
-    plt.savefig(f"wind_{time}_{zoom}.png")
+    fig.savefig(f"wind_{time}_{zoom}.png")
+    plt.close(fig)
 
 
 def latex_code(mesonh: MesoNH, i_lim: tuple, j_lim: tuple, time: str, resol_dx: int):
@@ -311,28 +338,23 @@ def latex_code(mesonh: MesoNH, i_lim: tuple, j_lim: tuple, time: str, resol_dx:
     lon = mesonh.longitude
     lat = mesonh.latitude
 
-    content = "\\begin{center} \\begin{tabular}{rl}"
-    content += f"\n\t\\textbf{{Heure simulation}}    & {time} TU \\\\"
-    content += "\n\t\\textbf{Heure observation}   & \\\\"
-    content += (
-        f"\n\t\\textbf{{Longitude}}           & {lon[j_lim[0], i_lim[0]]:.5f}°E"
-        f" -- {lon[j_lim[1], i_lim[1]]:.5f}°E \\\\"
-    )
-    content += f"\n\t\\textbf{{Index longitude}}     & {i_lim[0]} -- {i_lim[1]} \\\\"
-    content += (
-        f"\n\t\\textbf{{Distance zonale}}     & {(i_lim[1] - i_lim[0]) * resol_dx/1000}~km \\\\"
-    )
-    content += (
-        f"\n\t\\textbf{{Latitude}}            & {lat[j_lim[0], i_lim[0]]:.5f}°N"
-        f" -- {lat[j_lim[1], i_lim[1]]:.5f}°N \\\\"
-    )
-    content += f"\n\t\\textbf{{Index latitude}}      & {j_lim[0]} -- {j_lim[1]} \\\\"
-    content += (
-        f"\n\t\\textbf{{Distance méridienne}} & {(j_lim[1] - j_lim[0]) * resol_dx/1000}~km \\\\"
-    )
-    content += "\n\\end{tabular} \\end{center}"
-
-    print(content)
+    # One join instead of repeated str += , which reallocates the whole string on each line
+    parts = [
+        "\\begin{center} \\begin{tabular}{rl}",
+        f"\t\\textbf{{Heure simulation}}    & {time} TU \\\\",
+        "\t\\textbf{Heure observation}   & \\\\",
+        f"\t\\textbf{{Longitude}}           & {lon[j_lim[0], i_lim[0]]:.5f}°E"
+        f" -- {lon[j_lim[1], i_lim[1]]:.5f}°E \\\\",
+        f"\t\\textbf{{Index longitude}}     & {i_lim[0]} -- {i_lim[1]} \\\\",
+        f"\t\\textbf{{Distance zonale}}     & {(i_lim[1] - i_lim[0]) * resol_dx/1000}~km \\\\",
+        f"\t\\textbf{{Latitude}}            & {lat[j_lim[0], i_lim[0]]:.5f}°N"
+        f" -- {lat[j_lim[1], i_lim[1]]:.5f}°N \\\\",
+        f"\t\\textbf{{Index latitude}}      & {j_lim[0]} -- {j_lim[1]} \\\\",
+        f"\t\\textbf{{Distance méridienne}} & {(j_lim[1] - j_lim[0]) * resol_dx/1000}~km \\\\",
+        "\\end{tabular} \\end{center}",
+    ]
+
+    print("\n".join(parts))
 
 
 def run_all(resol_dx, args: Iterable, *, plot: bool = False, latex: bool = False):
@@ -368,6 +390,44 @@ def run_all(resol_dx, args: Iterable, *, plot: bool = False, latex: bool = False
             latex_code(mesonh, i_lim, j_lim, time, resol_dx)
 
 
+def _plot_one_zoom(resol_dx: int, i_lim: tuple, j_lim: tuple, hour: int, minute: int):
+    """
+    Plot the three zoomed maps of one timestamp in a worker process. The worker builds its own
+    reader and figures so that no matplotlib nor NetCDF state is shared between the processes.
+    """
+    # The workers run headless: select the Agg backend so no display is needed
+    matplotlib.use("Agg")
+
+    mesonh = get_mesonh(resol_dx)
+    mesonh.get_data(get_time_index(hour, minute))
+    time = f"{str(hour).zfill(2)}h{str(minute).zfill(2)}"
+    plot_zoom(mesonh, i_lim, j_lim, time, resol_dx)
+
+
+def plot_zoom_batch(resol_dx: int, args: Iterable):
+    """
+    Run ``plot_zoom`` over a list of pre-defined zooms on a pool of worker processes.
+
+    Each zoom is an independent read + render + PNG encode, so the batch scales almost linearly
+    with the number of cores instead of running the zooms one after the other as ``run_all``
+    does.
+
+    Parameters
+    ----------
+    resol_dx : int
+        The resolution of the simulation.
+    args : Iterable
+        The zooms to plot, in the same format as for ``run_all``.
+    """
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_plot_one_zoom, resol_dx, i_lim, j_lim, hour, minute)
+            for i_lim, j_lim, hour, minute in args
+        ]
+        for future in futures:
+            future.result()
+
+
 # if __name__ == "__main__":
 # time_index = 2
 
@@ -8,10 +8,40 @@ This module provides some classes to plot several types of graphs from netcdf fi
 of intern organization can be managed throught a reader class.
 """
 
+import functools
+
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import matplotlib.pyplot as plt
 import numpy as np
+import shapely.geometry as sgeom
+from matplotlib.artist import Artist
+
+# Shared PlateCarree instance: constructing a CRS goes through the PROJ database, so it is built
+# once here instead of once per axes/transform call
+PLATE_CARREE = ccrs.PlateCarree()
+
+# Default keyword sets of init_axes, built once at import; they are never mutated, callers that
+# pass their own dict fully override the feature and gridline defaults
+_FIG_KW = {"layout": "compressed"}
+_FEATURE_KW = {"linewidth": 1, "alpha": 0.5}
+_GLINES_KW = {"draw_labels": True, "linewidth": 0.5, "alpha": 0.5}
+
+
+@functools.lru_cache(maxsize=4)
+def _extent_features(extent: tuple):
+    """
+    Returns the coastline and border features restricted to the geometries that intersect the
+    given extent. Iterating and intersecting the full Natural Earth geometry set is one of the
+    slowest parts of drawing a map, and the result only depends on the extent, so it is computed
+    once per extent and cached.
+    """
+    box = sgeom.box(extent[0], extent[2], extent[1], extent[3])
+    features = []
+    for feature in (cfeature.COASTLINE, cfeature.BORDERS):
+        geoms = [geom for geom in feature.geometries() if box.intersects(geom)]
+        features.append(cfeature.ShapelyFeature(geoms, PLATE_CARREE))
+    return tuple(features)
 
 
 class Map:
@@ -33,6 +63,37 @@ class Map:
         self.longitude = longitude
         self.latitude = latitude
         self.axes = None
+        self._grid = None
+        self._grid_key = None
+        self._contourf = None
+        self._mesh = None
+
+    def reset_axes(self):
+        """
+        Forget the axes and the artists bound to them, so the next ``init_axes`` call starts from
+        a clean state instead of replacing artists that belong to a discarded figure.
+        """
+        self.axes = None
+        self._grid = None
+        self._grid_key = None
+        self._contourf = None
+        self._mesh = None
+
+    def _projected_grid(self):
+        """
+        Project the lon/lat grid into the axes projection once and cache the result, so cartopy
+        doesn't have to transform every contour path of every call. The cache is invalidated
+        whenever the coordinates or the axes change.
+        """
+        key = (id(self.longitude), id(self.latitude), id(self.axes))
+        if self._grid_key != key:
+            longitude, latitude = self.longitude, self.latitude
+            if np.ndim(longitude) == 1:
+                longitude, latitude = np.meshgrid(longitude, latitude)
+            xyz = self.axes.projection.transform_points(PLATE_CARREE, longitude, latitude)
+            self._grid = (xyz[..., 0], xyz[..., 1])
+            self._grid_key = key
+        return self._grid
 
     def init_axes(
         self,
@@ -66,26 +127,34 @@ class Map:
             is None. Otherwise, fig is the new figure, axes the geoaxes and glines a gridlines
             object.
         """
-        if not fig_kw:
-            fig_kw = {}
-
-        if not axes_kw:
-            axes_kw = {}
-
-        if not feature_kw:
-            feature_kw = {"linewidth": 1, "alpha": 0.5}
-
-        if not glines_kw:
-            glines_kw = {"draw_labels": True, "linewidth": 0.5, "alpha": 0.5}
+        # Compressed layout at figure creation replaces any per-draw layout solver pass; the
+        # defaults come from the module-level dicts instead of being rebuilt on every call
+        fig_kw = {**_FIG_KW, **fig_kw} if fig_kw else _FIG_KW
+        axes_kw = axes_kw or {}
+        feature_kw = feature_kw or _FEATURE_KW
+        glines_kw = glines_kw or _GLINES_KW
 
         fig = None
         self.axes = axes
         if not self.axes:
             fig = plt.figure(**fig_kw)
-            self.axes = plt.axes(projection=ccrs.PlateCarree(), **axes_kw)
+            self.axes = plt.axes(projection=PLATE_CARREE, **axes_kw)
+
+        # The domain is known up-front from the coordinate arrays: freeze it so every following
+        # contourf/pcolormesh skips cartopy's per-artist autoscale pass, and only add the feature
+        # geometries that actually intersect it
+        extent = (
+            float(np.min(self.longitude)),
+            float(np.max(self.longitude)),
+            float(np.min(self.latitude)),
+            float(np.max(self.latitude)),
+        )
+        coastline, borders = _extent_features(extent)
+        self.axes.add_feature(coastline, **feature_kw)
+        self.axes.add_feature(borders, **feature_kw)
 
-        self.axes.add_feature(cfeature.COASTLINE, **feature_kw)
-        self.axes.add_feature(cfeature.BORDERS, **feature_kw)
+        self.axes.set_extent(extent, crs=PLATE_CARREE)
+        self.axes.set_autoscale_on(False)
 
         glines = self.axes.gridlines(**glines_kw)
         glines.top_labels = glines.right_labels = False
@@ -130,7 +199,7 @@ class Map:
         )
         return title
 
-    def plot_contourf(self, var_array: np.array, **kwargs):
+    def plot_contourf(self, var_array: np.array, *, replace: bool = False, **kwargs):
         """
         Add a contourf to the Map axes.
 
@@ -138,15 +207,45 @@ class Map:
         ----------
         var_array : np.array
             The NumPy array to plot.
+        replace : bool, keyword-only, optionnal
+            By default it's set on False. If set on True, the contourf previously added by this
+            Map is removed first, so a loop can redraw on the same axes without accumulating
+            artists.
         kwargs
-            These keywords arguments will be given to ``axes.contourf``.
+            These keywords arguments will be given to ``axes.contourf``. The ContourPy
+            ``algorithm`` is set on "serial", faster than matplotlib's default "mpl2014"; it can
+            be overridden with e.g. ``algorithm="threaded"``.
 
         Returns
         ------
         contourf : plt.QuadContourSet
             The added contourf.
         """
-        contourf = self.axes.contourf(self.longitude, self.latitude, var_array, **kwargs)
+        kwargs.setdefault("algorithm", "serial")
+        kwargs.setdefault("transform", self.axes.projection)
+        x_proj, y_proj = self._projected_grid()
+
+        # When the field carries a fill mask (e.g. over the ocean), restrict the contouring to the
+        # bounding box of the valid cells so ContourPy doesn't walk the masked area
+        mask = np.ma.getmaskarray(var_array)
+        if mask.any() and not mask.all():
+            rows, cols = np.where(~mask)
+            window = (slice(rows.min(), rows.max() + 1), slice(cols.min(), cols.max() + 1))
+            var_array = var_array[window]
+            x_proj, y_proj = x_proj[window], y_proj[window]
+
+        if replace and self._contourf is not None:
+            self._contourf.remove()
+        contourf = self.axes.contourf(x_proj, y_proj, var_array, **kwargs)
+        self._contourf = contourf
+
+        # The exported PNG is a raster anyway: rasterizing the filled layers lets Agg composite
+        # one bitmap per contourf instead of drawing every polygon layer as vector paths
+        if isinstance(contourf, Artist):
+            contourf.set_rasterized(True)
+        else:  # before matplotlib 3.8 the ContourSet is a plain collection of PathCollection
+            for collection in contourf.collections:
+                collection.set_rasterized(True)
 
         return contourf
 
@@ -159,17 +258,56 @@ class Map:
         var_array : np.array
             The NumPy array to plot.
         kwargs
-            These keywords arguments will be given to ``axes.contour``.
+            These keywords arguments will be given to ``axes.contour``. The ContourPy
+            ``algorithm`` is set on "serial" as for ``plot_contourf``.
 
         Returns
         ------
         contour : plt.QuadContourSet
             The added contour.
         """
-        contour = self.axes.contour(self.longitude, self.latitude, var_array, **kwargs)
+        kwargs.setdefault("algorithm", "serial")
+        kwargs.setdefault("transform", self.axes.projection)
+        x_proj, y_proj = self._projected_grid()
+        contour = self.axes.contour(x_proj, y_proj, var_array, **kwargs)
 
         return contour
 
+    def plot_pcolormesh(self, var_array: np.array, *, replace: bool = False, **kwargs):
+        """
+        Add a pcolormesh to the Map axes.
+
+        Unlike a contourf, the returned QuadMesh is a single artist that can be updated in place
+        with ``mesh.set_array(new_array.ravel())``, which makes it the right choice for animation
+        frames: memory stays constant instead of growing with one contour set per frame.
+
+        Parameters
+        ----------
+        var_array : np.array
+            The NumPy array to plot.
+        replace : bool, keyword-only, optionnal
+            By default it's set on False. If set on True and a mesh was already added by this Map,
+            the data of the existing QuadMesh are updated in place instead of creating a new
+            artist.
+        kwargs
+            These keywords arguments will be given to ``axes.pcolormesh``.
+
+        Returns
+        ------
+        mesh : plt.QuadMesh
+            The added mesh.
+        """
+        if replace and self._mesh is not None:
+            self._mesh.set_array(var_array)
+            return self._mesh
+
+        kwargs.setdefault("shading", "auto")
+        kwargs.setdefault("rasterized", True)
+        mesh = self.axes.pcolormesh(self.longitude, self.latitude, var_array, **kwargs)
+        self._mesh = mesh
+
+        return mesh
+
     def plot_quiver(
         self,
         x_var_array: np.array,
@@ -207,11 +345,23 @@ class Map:
         if not y_mesh:
             y_mesh = y_size // 30
 
+        def compact(array):
+            """
+            Decimate the array and copy it to a contiguous float32 buffer. Masked cells are
+            filled with NaN first — a bare cast would strip the mask and turn fill values into
+            finite floats — so quiver still skips the corresponding arrows.
+            """
+            window = array[::y_mesh, ::x_mesh]
+            return np.ascontiguousarray(np.ma.filled(window, np.nan), dtype=np.float32)
+
+        # The strided slices are views with large gaps between the rows: copying them into small
+        # contiguous float32 arrays keeps the quiver transform and draw on cache-friendly memory
+        # and avoids the internal float64 copy matplotlib makes of non-contiguous input
         quiver = self.axes.quiver(
-            self.longitude[::y_mesh, ::x_mesh],
-            self.latitude[::y_mesh, ::x_mesh],
-            x_var_array[::y_mesh, ::x_mesh],
-            y_var_array[::y_mesh, ::x_mesh],
+            compact(self.longitude),
+            compact(self.latitude),
+            compact(x_var_array),
+            compact(y_var_array),
             **kwargs
         )
 
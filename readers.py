@@ -1,539 +1,897 @@
-"""
-Readers
-=======
-
-Description
------------
-This module provides a number of reader classes for managing different types of time and variables.
-These classes are all structured in the same way, so that they can be used in the same way
-regardless of the files or variables managed.
-
-It also gives some basic functions to manipulate index and conversion from lon/lat to index and
-index to lat/lon.
-
-Create a reader class
----------------------
-To create a reader class, you should have the following attributes:
-
-* files     : the list of files
-
-* data      : the current open file
-
-* longitude : the longitude of the measures
-
-* latitude  : the latitude of the measures
-
-and the following methods:
-
-* get_data(file_index: int) to open a file
-
-* get_var(*varnames, func: Callable = lambda x: x) to get a variable
-
-* get_limits(*varnames, func: Callable = lambda x: x) to get the min and max of a variable
-"""
-
-from collections.abc import Callable, Iterable
-
-import numpy as np
-from netCDF4 import Dataset
-
-
-class MesoNH:
-    """
-    MesoNH is a reader class that reads Meso-NH files.
-
-    Attributes
-    ----------
-    files : list
-        The list of the Meso-NH files.
-    data : Dataset
-        The current file open.
-    longitude : np.array
-        The longitudes.
-    latitude : np.array
-        The latitudes.
-    """
-
-    def __init__(self, files):
-        """Constructor method."""
-        self.files = files
-        self.data = None
-
-        data = Dataset(self.files[0])
-        self.longitude = data.variables["longitude"][:, :]
-        self.latitude = data.variables["latitude"][:, :]
-
-    def get_data(self, file_index: int):
-        """
-        Open the file corresponding to the given file_index. The
-        Dataset object is stored into MesoNH.data.
-
-        Parameters
-        ----------
-        file_index : int
-            The index of the the file to open.
-        """
-        self.data = Dataset(self.files[file_index])
-
-    def get_var(self, *varnames, func: Callable = lambda x: x):
-        """
-        Returns the NumPy array corresponding to result given by func applied on the given
-        variables.
-
-        Parameters
-        ----------
-        varnames : str
-            Variable names to give to func.
-        func : Callable, keyword-only, optionnal
-            The function to apply to the given variables.
-
-        Returns
-        -------
-        out : np.array
-            The result given by func.
-        """
-        args = []
-        for varname in varnames:
-            args.append(self.data.variables[varname][0])
-
-        return func(*args)
-
-    def get_stats(
-        self,
-        index_i: int,
-        index_j: int,
-        *varnames,
-        func: Callable = lambda x: x,
-        t_range: iter = None,
-        size: int = 1,
-    ):
-        """
-        Compute spatio-temporal limits average and standard deviation over a group of pixel centered
-        on a given position and over a given time range.
-
-        .. note:
-            The standard deviation is calculated for each time step and it returns the average
-            standard deviation.
-
-        Parameters
-        ----------
-        index_i : int
-            The index on the x-axis.
-        index_j : int
-            The index on the y-axis
-        varnames : str
-            Variable names to give to func.
-        func : Callable, keyword-only, optionnal
-            The function to apply to the given variables.
-        t_range : iter, keyword-only, optionnal
-            The temporal range over wich the average is to be calculated. By default all the
-            available time interval will be taken.
-            You can give a range or the list of the index you want.
-        size : int, keyword-only, optionnal
-            The size of the spatial average in index. By default it's set on 1, so the average
-            will be calculated of the given case and over the cases around in the four
-            directions:
-
-                      size ├───┤
-                ───┌───┬───┬───┐ ┬
-                j+1│   │   │   │ │ size
-                ───├───┼───┼───┤ ┴
-                 j │   │i;j│   │
-                ───├───┼───┼───┤
-                j-1│   │   │   │
-                ───└───┴───┴───┘
-                   │i-1│ i │i+1│
-
-        Returns
-        -------
-        out : tuple
-            A tuple that contains the limits, the average and the standard deviation.
-        """
-        if not t_range:
-            t_range = range(0, len(self.files))
-
-        mean_per_timestep = []
-        std_per_timestep = []
-        var_min, var_max = np.inf, -np.inf
-        for i in t_range:
-            data = Dataset(self.files[i])
-
-            args = []
-            for varname in varnames:
-                args.append(data.variables[varname][0])
-            array = func(*args)
-            array = array[index_j - size : index_j + size, index_i - size : index_i + size]
-
-            var_min = min(var_min, array.min())
-            var_max = max(var_max, array.max())
-
-            mean_per_timestep.append(np.mean(array))
-            std_per_timestep.append(np.std(array))
-
-        return (var_min, var_max), np.mean(mean_per_timestep), np.mean(std_per_timestep)
-
-    def get_limits(self, *varnames, func: Callable = lambda x: x):
-        """
-        Search min and max of a given variable.
-
-        Parameters
-        ----------
-        varnames : str
-            The names of the variables.
-        func : Callable, keyword-only, optionnal
-            The function to apply to the given variables.
-
-        Returns
-        -------
-        out : tuple
-            A tuple containing two elements: (var_min, var_max).
-        """
-        var_min = np.inf
-        var_max = -np.inf
-        for _, file in enumerate(self.files):
-            data = Dataset(file)
-
-            args = []
-            for varname in varnames:
-                args.append(data.variables[varname][0])
-            result = func(*args)
-
-            current_min = result.min()
-            current_max = result.max()
-
-            var_min = min(var_min, current_min)
-            var_max = max(var_max, current_max)
-
-        return var_min, var_max
-
-
-class Antilope:
-    """
-    Antilope is a reader class that reads ANTILOPE files.
-
-    Attributes
-    ----------
-    files : list
-        The list of the Meso-NH files.
-    data : Dataset
-        The current file open.
-    longitude : np.array
-        The longitudes.
-    latitude : np.array
-        The latitudes.
-    day_index : int
-        The day to selecte in files.
-    """
-
-    def __init__(self, files, day_index: int):
-        """Contructor method."""
-        self.files = files
-        self.day_index = day_index
-        self.data = None
-
-        data = Dataset(self.files[0])
-        self.longitude = data.variables["lon"][:]
-        self.latitude = data.variables["lat"][:]
-
-    def get_data(self, file_index: int):
-        """
-        Open the file corresponding to the given file_index. The
-        Dataset object is stored into Antilope.data.
-
-        Parameters
-        ----------
-        file_index : int
-            The index of the the file to open.
-        """
-        self.data = Dataset(self.files[file_index])
-
-    def get_var(self, *varnames, func: Callable = lambda x: x):
-        """
-        Returns the NumPy array corresponding to result given by func applied on the given
-        variables.
-
-        Parameters
-        ----------
-        varnames : str
-            The names of the variables.
-        func : Callable, keyword-only, optionnal
-            The function to apply to the given variables.
-
-        Returns
-        -------
-        out : np.array
-            The result given by func.
-        """
-        args = []
-        for varname in varnames:
-            args.append(self.data.variables[varname][self.day_index])
-
-        return func(*args)
-
-    def get_limits(self, *varnames, func: Callable = lambda x: x):
-        """
-        Search min and max of a given variable.
-
-        Parameters
-        ----------
-        varnames : str
-            The names of the variables.
-        func : Callable, keyword-only, optionnal
-            The function to apply to the given variables.
-
-        Returns
-        -------
-        out : tuple
-            A tuple containing two elements: (var_min, var_max).
-        """
-        var_min = np.inf
-        var_max = -np.inf
-        for _, file in enumerate(self.files):
-            data = Dataset(file)
-
-            args = []
-            for varname in varnames:
-                args.append(data.variables[varname][self.day_index])
-            result = func(*args)
-
-            current_min = result.min()
-            current_max = result.max()
-
-            var_min = min(var_min, current_min)
-            var_max = max(var_max, current_max)
-
-        return var_min, var_max
-
-
-class Satellite:
-    """
-    Satellite is a reader class that reads satellite files.
-
-    Attributes
-    ----------
-    files : list
-        The list of the Meso-NH files.
-    data : Dataset
-        The current file open.
-    longitude : np.array
-        The longitudes.
-    latitude : np.array
-        The latitudes.
-    time_step : int
-        The temporal step inside the files.
-    """
-
-    def __init__(self, files, time_step: int):
-        """Contructor method."""
-        self.files = files
-        self.time_step = time_step
-        self.data = None
-
-        data = Dataset(self.files[0])
-        self.longitude = data.variables["lon"][:]
-        self.latitude = data.variables["lat"][:]
-
-    def get_data(self, file_index: int):
-        """
-        Open the file corresponding to the given file_index. The
-        Dataset object is stored into Satellite.data.
-
-        Parameters
-        ----------
-        file_index : int
-            The index of the the file to open.
-        """
-        self.data = Dataset(self.files[file_index])
-
-    def get_var(self, *varnames, func: Callable = lambda x: x):
-        """
-        Returns the NumPy array corresponding to result given by func applied on the given
-        variables.
-
-        Parameters
-        ----------
-        varnames : str
-            The names of the variables.
-        func : Callable, keyword-only, optionnal
-            The function to apply to the given variables.
-
-        Returns
-        -------
-        out : np.array
-            The result given by func.
-        """
-        args = []
-        for varname in varnames:
-            args.append(self.data.variables[varname][self.time_step])
-
-        return func(*args)
-
-    def get_limits(self, *varnames, func: Callable = lambda x: x):
-        """
-        Search min and max of a given variable.
-
-        Parameters
-        ----------
-        varnames : str
-            The names of the variables.
-        func : Callable, keyword-only, optionnal
-            The function to apply to the given variables.
-
-        Returns
-        -------
-        out : tuple
-            A tuple containing two elements: (var_min, var_max).
-        """
-        var_min = np.inf
-        var_max = -np.inf
-        for _, file in enumerate(self.files):
-            data = Dataset(file)
-
-            args = []
-            for varname in varnames:
-                args.append(data.variables[varname][self.time_step])
-            result = func(*args)
-
-            current_min = result.min()
-            current_max = result.max()
-
-            var_min = min(var_min, current_min)
-            var_max = max(var_max, current_max)
-
-        return var_min, var_max
-
-
-def get_mesonh(resolution_dx: int, path: str = "../Donnees/"):
-    """
-    Returns a Meso-NH reader for the given resolution and path.
-
-    Parameters
-    ----------
-    resolution_dx : int
-        The wanted resolution.
-    path : str, optionnal
-        The path of the netCDF files. By default it's set on ../Donnees/.
-
-    Returns
-    -------
-    out : MesoNH
-        The Meso-NH reader.
-    """
-    files = [
-        f"{path}DX{resolution_dx}/CORSE.1.SEG01.OUT.{str(t).zfill(3)}.nc" for t in range(1, 361)
-    ]
-    return MesoNH(files)
-
-
-def get_index(array: np.array, target: float):
-    """
-    Search and return the index of the value closest to target in the given array. This function
-    can handle n-dimensionnal arrays.
-
-    Parameters
-    ----------
-    array : np.array
-        The array in which to search.
-    target : float
-        The value to search in array.
-
-    Returns
-    -------
-    out : np.array
-        The index of the value closest to target in array. If seraval indexes matche, it
-        only returns the first one.
-    """
-    delta = np.abs(target - array)
-    index = np.array(np.where(delta == delta.min()))
-    return index[:, 0]
-
-
-def get_index_from_vect(x_array: np.array, y_array: np.array, value: Iterable[float, float]):
-    """
-    Search for the given vector value in the x and y-array.
-
-    Parameters
-    ----------
-    x_array : np.array
-        The components on the x-axis.
-    y_array : np.array
-        The components on the y-axis.
-    value : Iterable[float, float]
-        The vector to search for.
-
-    Returns
-    -------
-    out : np.array
-        The index on x- and y-axis.
-    """
-    norms = np.sqrt((x_array - value[0]) ** 2 + (y_array - value[1]) ** 2)
-    index = np.array(np.where(norms == norms.min()))
-    return index[:, 0]
-
-
-def index_to_lonlat(reader, i: int, j: int):
-    """
-    Get the longitudes and latitudes from given limits indexes.
-
-    Parameters
-    ----------
-    reader
-        An instance of reader.
-    i : innt
-        The index on x-axis.
-    j : int
-        The index on y-axis.
-
-    Returns
-    -------
-    out : tuple
-        A tuple that contains two tuples: (longitude_min, longitude_max) and
-        (latitude_min, latitude_max).
-    """
-    lon = reader.longitude[j, i]
-    lat = reader.latitude[j, i]
-    return (lon, lat)
-
-
-def lonlat_to_index(reader, lon: float, lat: float):
-    """
-    Get the indexes from given limit longitudes and latitudes.
-
-    .. warning::
-        Due to projection, the returned indexes may not match perfectly match the given lon/lat.
-
-    Parameters
-    ----------
-    reader
-        An instance of reader.
-    lon : tuple
-        The longitude to search.
-    lat : tuple
-        The latitude to search.
-
-    Returns
-    -------
-    out : tuple
-        A tuple that contains two elements: (i, j).
-    """
-    j, i = get_index_from_vect(reader.longitude, reader.latitude, (lon, lat))
-    return i, j
-
-
-def get_time_index(hour: int, minute: int):
-    """
-    Compute the index of the Meso-NH file from hour and minute.
-
-    Parameters
-    ----------
-    hour : int
-        The hours.
-    minute : int
-        The minutes.
-
-    Returns
-    -------
-    out : int
-        The index of the file corresponding to the given timestamp.
-    """
-    return (hour - 4) * 60 + (minute - 1)
+"""
+Readers
+=======
+
+Description
+-----------
+This module provides a number of reader classes for managing different types of time and variables.
+These classes are all structured in the same way, so that they can be used in the same way
+regardless of the files or variables managed.
+
+It also gives some basic functions to manipulate index and conversion from lon/lat to index and
+index to lat/lon.
+
+Create a reader class
+---------------------
+To create a reader class, you should have the following attributes:
+
+* files     : the list of files
+
+* data      : the current open file
+
+* longitude : the longitude of the measures
+
+* latitude  : the latitude of the measures
+
+and the following methods:
+
+* get_data(file_index: int) to open a file
+
+* get_var(*varnames, func: Callable = lambda x: x) to get a variable
+
+* get_limits(*varnames, func: Callable = lambda x: x) to get the min and max of a variable
+"""
+
+import functools
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from netCDF4 import Dataset
+
+
+@functools.lru_cache(maxsize=64)
+def open_dataset(filename: str):
+    """
+    Open a NetCDF file and keep the handle in an lru_cache. Opening a Dataset parses all the file
+    metadata, which is expensive when the same file is visited several times (overlapping get_stats
+    windows, consecutive ACPRR differences); reusing the handle skips that cost.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the file to open.
+
+    Returns
+    -------
+    out : Dataset
+        The open Dataset.
+    """
+    return Dataset(filename)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_coordinates(filename: str, lon_name: str, lat_name: str):
+    """
+    Read the coordinate arrays of a file once and keep them in an lru_cache. The grids are
+    identical across all files of a product, so readers built on the same product share one
+    in-memory copy instead of re-reading megabytes of coordinates per instantiation.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the file to read the coordinates from.
+    lon_name : str
+        The name of the longitude variable.
+    lat_name : str
+        The name of the latitude variable.
+
+    Returns
+    -------
+    out : tuple
+        A tuple containing two elements: (longitude, latitude).
+    """
+    data = open_dataset(filename)
+    return data.variables[lon_name][...], data.variables[lat_name][...]
+
+
+class MesoNH:
+    """
+    MesoNH is a reader class that reads Meso-NH files.
+
+    Attributes
+    ----------
+    files : list
+        The list of the Meso-NH files.
+    data : Dataset
+        The current file open.
+    longitude : np.array
+        The longitudes.
+    latitude : np.array
+        The latitudes.
+    chunk_cache : int
+        The size in bytes of the HDF5 chunk cache applied to the 2-D variables.
+    """
+
+    def __init__(self, files, chunk_cache: int = None):
+        """Constructor method."""
+        self.files = files
+        self.data = None
+        self.chunk_cache = chunk_cache
+
+        self.longitude, self.latitude = _read_coordinates(self.files[0], "longitude", "latitude")
+
+    def get_data(self, file_index: int):
+        """
+        Open the file corresponding to the given file_index. The
+        Dataset object is stored into MesoNH.data.
+
+        If a chunk cache size was given to the constructor, it is applied to each 2-D variable of
+        the file so that a whole chunk is decompressed only once per access.
+
+        Parameters
+        ----------
+        file_index : int
+            The index of the the file to open.
+        """
+        self.data = open_dataset(self.files[file_index])
+        if self.chunk_cache:
+            for variable in self.data.variables.values():
+                if variable.ndim >= 2:
+                    variable.set_var_chunk_cache(
+                        size=self.chunk_cache, nelems=521, preemption=0.75
+                    )
+
+    def get_var(
+        self,
+        *varnames,
+        func: Callable = lambda x: x,
+        dtype: np.dtype = None,
+        window: tuple = None,
+    ):
+        """
+        Returns the NumPy array corresponding to result given by func applied on the given
+        variables.
+
+        Parameters
+        ----------
+        varnames : str
+            Variable names to give to func.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+        dtype : np.dtype, keyword-only, optionnal
+            If given, each variable is cast to this dtype before func is applied. Casting to
+            np.float32 halves the memory traffic of the downstream plotting.
+        window : tuple, keyword-only, optionnal
+            If given, a ``(slice_j, slice_i)`` pair applied inside the NetCDF read itself, so
+            only the corresponding chunks are read and decompressed instead of the full domain.
+
+        Returns
+        -------
+        out : np.array
+            The result given by func.
+        """
+        if window is None:
+            index = 0
+        else:
+            index = (0, *window)
+
+        # Local binding of the variables dict: get_var runs once per frame in the animation
+        # loops, so the attribute lookups are hoisted out of the comprehension
+        variables = self.data.variables
+        if dtype:
+            args = [variables[varname][index].astype(dtype, copy=False) for varname in varnames]
+        else:
+            args = [variables[varname][index] for varname in varnames]
+
+        return func(*args)
+
+    def get_stats(
+        self,
+        index_i: int,
+        index_j: int,
+        *varnames,
+        func: Callable = lambda x: x,
+        t_range: iter = None,
+        size: int = 1,
+    ):
+        """
+        Compute spatio-temporal limits average and standard deviation over a group of pixel centered
+        on a given position and over a given time range.
+
+        .. note:
+            The standard deviation is calculated for each time step and it returns the average
+            standard deviation.
+
+        Parameters
+        ----------
+        index_i : int
+            The index on the x-axis.
+        index_j : int
+            The index on the y-axis
+        varnames : str
+            Variable names to give to func.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+        t_range : iter, keyword-only, optionnal
+            The temporal range over wich the average is to be calculated. By default all the
+            available time interval will be taken.
+            You can give a range or the list of the index you want.
+        size : int, keyword-only, optionnal
+            The size of the spatial average in index. By default it's set on 1, so the average
+            will be calculated of the given case and over the cases around in the four
+            directions:
+
+                      size ├───┤
+                ───┌───┬───┬───┐ ┬
+                j+1│   │   │   │ │ size
+                ───├───┼───┼───┤ ┴
+                 j │   │i;j│   │
+                ───├───┼───┼───┤
+                j-1│   │   │   │
+                ───└───┴───┴───┘
+                   │i-1│ i │i+1│
+
+        Returns
+        -------
+        out : tuple
+            A tuple that contains the limits, the average and the standard deviation.
+        """
+        if not t_range:
+            t_range = range(0, len(self.files))
+
+        mean_per_timestep = []
+        std_per_timestep = []
+        var_min, var_max = np.inf, -np.inf
+        # The window is given to the NetCDF read itself, so only the chunks covering the few
+        # pixels of interest are read and decompressed; func therefore receives the window, which
+        # is equivalent for the element-wise functions used here
+        window = (0, slice(index_j - size, index_j + size), slice(index_i - size, index_i + size))
+        for i in t_range:
+            data = open_dataset(self.files[i])
+
+            args = []
+            for varname in varnames:
+                args.append(data.variables[varname][window])
+            array = func(*args)
+
+            var_min = min(var_min, array.min())
+            var_max = max(var_max, array.max())
+
+            mean_per_timestep.append(np.mean(array))
+            std_per_timestep.append(np.std(array))
+
+        return (var_min, var_max), np.mean(mean_per_timestep), np.mean(std_per_timestep)
+
+    def get_window(
+        self,
+        index_i: int,
+        index_j: int,
+        *varnames,
+        func: Callable = lambda x: x,
+        t_range: iter = None,
+        size: int = 1,
+        dtype: np.dtype = None,
+    ):
+        """
+        Extract the spatial window used by get_stats for every time step of t_range and stack the
+        slices in a single array. Callers that need statistics over several (possibly overlapping)
+        time bins can then slice this stack with NumPy instead of issuing one get_stats call, and
+        the file reads it implies, per bin.
+
+        Parameters
+        ----------
+        index_i : int
+            The index on the x-axis.
+        index_j : int
+            The index on the y-axis
+        varnames : str
+            Variable names to give to func.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+        t_range : iter, keyword-only, optionnal
+            The temporal range to extract. By default all the available time interval will be
+            taken.
+        size : int, keyword-only, optionnal
+            The size of the spatial window in index, as for get_stats.
+        dtype : np.dtype, keyword-only, optionnal
+            If given, each variable is cast to this dtype before func is applied, as for get_var.
+            Casting to np.float32 halves the memory traffic of the downstream reductions.
+
+        Returns
+        -------
+        out : np.array
+            An array of shape ``(len(t_range), 2 * size, 2 * size)``.
+        """
+        if not t_range:
+            t_range = range(0, len(self.files))
+
+        # As in get_stats, the window goes into the NetCDF read so only the relevant chunks are
+        # read and decompressed
+        window = (0, slice(index_j - size, index_j + size), slice(index_i - size, index_i + size))
+
+        def window_of_file(i):
+            data = open_dataset(self.files[i])
+
+            args = []
+            for varname in varnames:
+                arg = data.variables[varname][window]
+                if dtype:
+                    arg = arg.astype(dtype, copy=False)
+                args.append(arg)
+            return func(*args)
+
+        # As for get_limits, the reads run on a thread pool: netCDF4 releases the GIL during the
+        # HDF5 calls, so the per-file latency overlaps; executor.map keeps the time order
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            window = list(executor.map(window_of_file, t_range))
+
+        return np.ma.stack(window)
+
+    def get_limits(self, *varnames, func: Callable = lambda x: x):
+        """
+        Search min and max of a given variable.
+
+        The files are scanned by a thread pool: each worker opens one file, applies func and
+        reduces it to a local (min, max) pair, so the I/O over the 360 files overlaps instead of
+        running sequentially.
+
+        Parameters
+        ----------
+        varnames : str
+            The names of the variables.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+
+        Returns
+        -------
+        out : tuple
+            A tuple containing two elements: (var_min, var_max).
+        """
+
+        def limits_of_file(file):
+            data = Dataset(file)
+
+            args = []
+            for varname in varnames:
+                args.append(data.variables[varname][0])
+            result = func(*args)
+
+            return result.min(), result.max()
+
+        var_min = np.inf
+        var_max = -np.inf
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for current_min, current_max in executor.map(limits_of_file, self.files):
+                var_min = min(var_min, current_min)
+                var_max = max(var_max, current_max)
+
+        return var_min, var_max
+
+
+class Antilope:
+    """
+    Antilope is a reader class that reads ANTILOPE files.
+
+    Attributes
+    ----------
+    files : list
+        The list of the Meso-NH files.
+    data : Dataset
+        The current file open.
+    longitude : np.array
+        The longitudes.
+    latitude : np.array
+        The latitudes.
+    day_index : int
+        The day to selecte in files.
+    """
+
+    def __init__(self, files, day_index: int):
+        """Contructor method."""
+        self.files = files
+        self.day_index = day_index
+        self.data = None
+
+        self.longitude, self.latitude = _read_coordinates(self.files[0], "lon", "lat")
+
+    def get_data(self, file_index: int):
+        """
+        Open the file corresponding to the given file_index. The
+        Dataset object is stored into Antilope.data.
+
+        Parameters
+        ----------
+        file_index : int
+            The index of the the file to open.
+        """
+        self.data = open_dataset(self.files[file_index])
+
+    def get_var(self, *varnames, func: Callable = lambda x: x, dtype: np.dtype = None):
+        """
+        Returns the NumPy array corresponding to result given by func applied on the given
+        variables.
+
+        Parameters
+        ----------
+        varnames : str
+            The names of the variables.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+        dtype : np.dtype, keyword-only, optionnal
+            If given, each variable is cast to this dtype before func is applied.
+
+        Returns
+        -------
+        out : np.array
+            The result given by func.
+        """
+        variables = self.data.variables
+        index = self.day_index
+        if dtype:
+            args = [variables[varname][index].astype(dtype, copy=False) for varname in varnames]
+        else:
+            args = [variables[varname][index] for varname in varnames]
+
+        return func(*args)
+
+    def get_limits(self, *varnames, func: Callable = lambda x: x):
+        """
+        Search min and max of a given variable.
+
+        As for MesoNH.get_limits, the per-file reductions run on a thread pool so the file reads
+        overlap.
+
+        Parameters
+        ----------
+        varnames : str
+            The names of the variables.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+
+        Returns
+        -------
+        out : tuple
+            A tuple containing two elements: (var_min, var_max).
+        """
+
+        def limits_of_file(file):
+            data = Dataset(file)
+
+            args = []
+            for varname in varnames:
+                args.append(data.variables[varname][self.day_index])
+            result = func(*args)
+
+            return result.min(), result.max()
+
+        var_min = np.inf
+        var_max = -np.inf
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for current_min, current_max in executor.map(limits_of_file, self.files):
+                var_min = min(var_min, current_min)
+                var_max = max(var_max, current_max)
+
+        return var_min, var_max
+
+
+class Satellite:
+    """
+    Satellite is a reader class that reads satellite files.
+
+    Attributes
+    ----------
+    files : list
+        The list of the Meso-NH files.
+    data : Dataset
+        The current file open.
+    longitude : np.array
+        The longitudes.
+    latitude : np.array
+        The latitudes.
+    time_step : int
+        The temporal step inside the files.
+    """
+
+    def __init__(self, files, time_step: int):
+        """Contructor method."""
+        self.files = files
+        self.time_step = time_step
+        self.data = None
+
+        self.longitude, self.latitude = _read_coordinates(self.files[0], "lon", "lat")
+
+    def get_data(self, file_index: int):
+        """
+        Open the file corresponding to the given file_index. The
+        Dataset object is stored into Satellite.data.
+
+        Parameters
+        ----------
+        file_index : int
+            The index of the the file to open.
+        """
+        self.data = open_dataset(self.files[file_index])
+
+    def get_var(self, *varnames, func: Callable = lambda x: x, dtype: np.dtype = None):
+        """
+        Returns the NumPy array corresponding to result given by func applied on the given
+        variables.
+
+        Parameters
+        ----------
+        varnames : str
+            The names of the variables.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+        dtype : np.dtype, keyword-only, optionnal
+            If given, each variable is cast to this dtype before func is applied.
+
+        Returns
+        -------
+        out : np.array
+            The result given by func.
+        """
+        variables = self.data.variables
+        index = self.time_step
+        if dtype:
+            args = [variables[varname][index].astype(dtype, copy=False) for varname in varnames]
+        else:
+            args = [variables[varname][index] for varname in varnames]
+
+        return func(*args)
+
+    def get_limits(self, *varnames, func: Callable = lambda x: x):
+        """
+        Search min and max of a given variable.
+
+        As for MesoNH.get_limits, the per-file reductions run on a thread pool so the file reads
+        overlap.
+
+        Parameters
+        ----------
+        varnames : str
+            The names of the variables.
+        func : Callable, keyword-only, optionnal
+            The function to apply to the given variables.
+
+        Returns
+        -------
+        out : tuple
+            A tuple containing two elements: (var_min, var_max).
+        """
+
+        def limits_of_file(file):
+            data = Dataset(file)
+
+            args = []
+            for varname in varnames:
+                args.append(data.variables[varname][self.time_step])
+            result = func(*args)
+
+            return result.min(), result.max()
+
+        var_min = np.inf
+        var_max = -np.inf
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for current_min, current_max in executor.map(limits_of_file, self.files):
+                var_min = min(var_min, current_min)
+                var_max = max(var_max, current_max)
+
+        return var_min, var_max
+
+
+# File names of the 360 simulation outputs, formatted once at import; get_mesonh only prepends
+# the resolution directory
+_MESONH_FILENAMES = tuple(f"CORSE.1.SEG01.OUT.{t:03d}.nc" for t in range(1, 361))
+
+
+@functools.lru_cache(maxsize=4)
+def get_mesonh(resolution_dx: int, path: str = "../Donnees/"):
+    """
+    Returns a Meso-NH reader for the given resolution and path. The reader is cached per
+    resolution: building one reads the coordinate arrays from the first simulation file, so
+    callers that ask several times for the same resolution (e.g. get_wind10 then get_pressure)
+    share a single instance.
+
+    Parameters
+    ----------
+    resolution_dx : int
+        The wanted resolution.
+    path : str, optionnal
+        The path of the netCDF files. By default it's set on ../Donnees/.
+
+    Returns
+    -------
+    out : MesoNH
+        The Meso-NH reader.
+    """
+    files = [f"{path}DX{resolution_dx}/{name}" for name in _MESONH_FILENAMES]
+    return MesoNH(files)
+
+
+@functools.lru_cache(maxsize=4)
+def get_mesonh_extent(resolution_dx: int, path: str = "../Donnees/"):
+    """
+    Returns the map extent of the Meso-NH domain for the given resolution. The result is cached so
+    callers that only need the four corner coordinates don't re-open the simulation files.
+
+    Parameters
+    ----------
+    resolution_dx : int
+        The wanted resolution.
+    path : str, optionnal
+        The path of the netCDF files. By default it's set on ../Donnees/.
+
+    Returns
+    -------
+    out : tuple
+        A tuple (longitude_min, longitude_max, latitude_min, latitude_max) to be given to
+        ``axes.set_extent``.
+    """
+    mesonh = get_mesonh(resolution_dx, path)
+    return (
+        mesonh.longitude[0, 0],
+        mesonh.longitude[-1, -1],
+        mesonh.latitude[0, 0],
+        mesonh.latitude[-1, -1],
+    )
+
+
+def get_limits_cached(
+    reader,
+    resolution_dx: int,
+    *varnames,
+    func: Callable = None,
+    func_tag: str = None,
+    cache_dir: str = "_levels_cache",
+):
+    """
+    Same as ``reader.get_limits`` but the result is cached on disk. The cache is keyed by the
+    resolution, the variable names and ``func_tag``, so repeated runs skip the full scan over
+    all the files.
+
+    Parameters
+    ----------
+    reader
+        An instance of reader.
+    resolution_dx : int
+        The resolution of the simulation, used as cache key.
+    varnames : str
+        The names of the variables.
+    func : Callable, keyword-only, optionnal
+        The function to apply to the given variables. By default no function is applied.
+    func_tag : str, keyword-only, optionnal
+        A short label identifying func in the cache key, e.g. "kmh". It is required whenever
+        func is given: without it, transformed and raw limits of the same variable would collide
+        on one cache entry and return each other's values.
+    cache_dir : str, keyword-only, optionnal
+        The directory where the limits are cached. By default it's set on _levels_cache.
+
+    Returns
+    -------
+    out : tuple
+        A tuple containing two elements: (var_min, var_max).
+
+    Raises
+    ------
+    ValueError
+        This exception is raised if a func is given without a func_tag.
+    """
+    if func is not None and not func_tag:
+        raise ValueError("a func_tag is required to key the cache when a func is given")
+
+    tag = f"_{func_tag}" if func_tag else ""
+    cache_file = os.path.join(cache_dir, f"{resolution_dx}_{'-'.join(varnames)}{tag}.npy")
+    if os.path.isfile(cache_file):
+        var_min, var_max = np.load(cache_file)
+        return var_min, var_max
+
+    if func is None:
+        var_min, var_max = reader.get_limits(*varnames)
+    else:
+        var_min, var_max = reader.get_limits(*varnames, func=func)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(cache_file, np.array([var_min, var_max]))
+    return var_min, var_max
+
+
+def get_window_cached(
+    reader,
+    resolution_dx: int,
+    index_i: int,
+    index_j: int,
+    *varnames,
+    size: int = 1,
+    cache_dir: str = "_window_cache",
+):
+    """
+    Same as ``MesoNH.get_window`` over the whole simulation, but with the stack cached on disk.
+    The cache is keyed by the resolution, the variable names, the position and the window size,
+    so re-running a station plot turns the 360 NetCDF reads into a single memory-mapped load.
+
+    The stack is cached untransformed: unit conversions are applied by the caller on the
+    returned array, so calls with different conversions share one cache entry instead of
+    silently serving each other transformed data.
+
+    .. note::
+        Masked cells, if any, are stored as NaN in the cache file and masked again on load, so
+        cold and warm calls both return a masked array.
+
+    Parameters
+    ----------
+    reader
+        A MesoNH reader instance.
+    resolution_dx : int
+        The resolution of the simulation, used as cache key.
+    index_i : int
+        The index on the x-axis.
+    index_j : int
+        The index on the y-axis
+    varnames : str
+        The names of the variables.
+    size : int, keyword-only, optionnal
+        The size of the spatial window in index, as for get_stats.
+    cache_dir : str, keyword-only, optionnal
+        The directory where the windows are cached. By default it's set on _window_cache.
+
+    Returns
+    -------
+    out : np.array
+        An array of shape ``(time, 2 * size, 2 * size)``.
+    """
+    cache_file = os.path.join(
+        cache_dir, f"{resolution_dx}_{'-'.join(varnames)}_{index_i}_{index_j}_{size}.npy"
+    )
+    if os.path.isfile(cache_file):
+        # Re-mask the NaN-encoded cells so the warm path honours the same masked-array contract
+        # as the cold one; the reductions would otherwise see NaN instead of skipping the cells
+        return np.ma.masked_invalid(np.load(cache_file, mmap_mode="r"))
+
+    window = reader.get_window(index_i, index_j, *varnames, size=size)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(cache_file, np.ma.filled(window.astype(np.float64), np.nan))
+    return window
+
+
+def get_index(array: np.array, target: float):
+    """
+    Search and return the index of the value closest to target in the given array. This function
+    can handle n-dimensionnal arrays.
+
+    Parameters
+    ----------
+    array : np.array
+        The array in which to search.
+    target : float
+        The value to search in array.
+
+    Returns
+    -------
+    out : np.array
+        The index of the value closest to target in array. If seraval indexes matche, it
+        only returns the first one.
+    """
+    # argmin scans the array once, where where(delta == delta.min()) would scan it twice
+    delta = np.abs(target - array)
+    return np.array(np.unravel_index(np.argmin(delta), array.shape))
+
+
+def get_index_from_vect(x_array: np.array, y_array: np.array, value: Iterable[float, float]):
+    """
+    Search for the given vector value in the x and y-array.
+
+    Parameters
+    ----------
+    x_array : np.array
+        The components on the x-axis.
+    y_array : np.array
+        The components on the y-axis.
+    value : Iterable[float, float]
+        The vector to search for.
+
+    Returns
+    -------
+    out : np.array
+        The index on x- and y-axis.
+    """
+    norms = np.hypot(x_array - value[0], y_array - value[1])
+    return np.array(np.unravel_index(np.argmin(norms), norms.shape))
+
+
+def index_to_lonlat(reader, i: int, j: int):
+    """
+    Get the longitudes and latitudes from given limits indexes.
+
+    Parameters
+    ----------
+    reader
+        An instance of reader.
+    i : innt
+        The index on x-axis.
+    j : int
+        The index on y-axis.
+
+    Returns
+    -------
+    out : tuple
+        A tuple that contains two tuples: (longitude_min, longitude_max) and
+        (latitude_min, latitude_max).
+    """
+    lon = reader.longitude[j, i]
+    lat = reader.latitude[j, i]
+    return (lon, lat)
+
+
+def nearest_index_1d(axis: np.array, value: float):
+    """
+    Search the index of the value closest to the given one in a sorted 1-D axis. Relies on a
+    binary search, so it runs in O(log n) where a full scan would be O(n).
+
+    Parameters
+    ----------
+    axis : np.array
+        The sorted 1-D array in which to search.
+    value : float
+        The value to search in axis.
+
+    Returns
+    -------
+    out : int
+        The index of the value closest to the given one.
+    """
+    index = np.searchsorted(axis, value)
+    if index == len(axis) or (
+        index > 0 and abs(axis[index - 1] - value) <= abs(axis[index] - value)
+    ):
+        index -= 1
+    return index
+
+
+def lonlat_to_index(reader, lon: float, lat: float):
+    """
+    Get the indexes from given limit longitudes and latitudes.
+
+    .. warning::
+        Due to projection, the returned indexes may not match perfectly match the given lon/lat.
+
+    Parameters
+    ----------
+    reader
+        An instance of reader.
+    lon : tuple
+        The longitude to search.
+    lat : tuple
+        The latitude to search.
+
+    Returns
+    -------
+    out : tuple
+        A tuple that contains two elements: (i, j).
+    """
+    longitude = reader.longitude
+    latitude = reader.latitude
+
+    # On a rectilinear grid the search is separable: two binary searches on the 1-D axes replace
+    # the nearest-neighbour scan over the whole 2-D grid
+    if (
+        longitude.ndim == 2
+        and np.array_equal(longitude[0], longitude[-1])
+        and np.array_equal(latitude[:, 0], latitude[:, -1])
+    ):
+        return nearest_index_1d(longitude[0], lon), nearest_index_1d(latitude[:, 0], lat)
+
+    j, i = get_index_from_vect(longitude, latitude, (lon, lat))
+    return i, j
+
+
+def get_time_index(hour: int, minute: int):
+    """
+    Compute the index of the Meso-NH file from hour and minute.
+
+    Parameters
+    ----------
+    hour : int
+        The hours.
+    minute : int
+        The minutes.
+
+    Returns
+    -------
+    out : int
+        The index of the file corresponding to the given timestamp.
+    """
+    return (hour - 4) * 60 + (minute - 1)
@@ -0,0 +1,16 @@
+#!/bin/sh
+# Rechunk the Meso-NH NetCDF files so that reading one 2-D field slice only
+# touches a few contiguous chunks instead of the whole file. To be run once on
+# a data directory, for instance:
+#
+#     ./rechunk.sh ../Donnees/DX250
+#
+if [ -z "$1" ]; then
+    echo "usage: $0 <data directory>" >&2
+    exit 1
+fi
+
+for file in "$1"/CORSE.1.SEG01.OUT.*.nc; do
+    echo "rechunking $file"
+    nccopy -k 4 -c "ni/512,nj/512,time/1" -d 1 "$file" "$file.tmp" && mv "$file.tmp" "$file"
+done